@@ -0,0 +1,405 @@
+"""
+Compare download throughput of Scrapy's default handler with the tuned
+profile of job_watcher.downloader against a local stand-in server.
+
+Scenarios:
+  direct  HTTPS requests to a single host
+  proxy   plain HTTP requests to several hosts through one forward proxy
+  tunnel  HTTPS requests to several hosts through CONNECT tunnels of one
+          proxy, like a proxied LinkedIn or Indeed crawl
+
+Profiles:
+  default  Scrapy's HTTP/1.1 handler
+  tuned    TunedDownloadHandler with HTTP/2 for direct HTTPS
+
+Both profiles accept the same response encodings, so only connection handling
+is compared.
+
+    python benchmarks/download_handler.py --requests 2000
+    python benchmarks/download_handler.py --scenario tunnel --runs 5
+
+The HTTP/2 side of the stand-in server needs `pip install "twisted[http2]"`.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SERVER_HOST = "127.0.0.1"
+# Other loopback addresses stand in for more hosts behind the proxy
+PROXIED_HOSTS = [f"127.0.0.{i}" for i in range(1, 9)]
+
+CARD = (
+    '<div class="base-search-card"><a class="base-card__full-link" '
+    'href="https://www.linkedin.com/jobs/view/engineer-{i}?trk=guest"></a>'
+    '<span class="sr-only">Software Engineer {i}</span>'
+    '<h4 class="base-search-card__subtitle"><a href="https://www.linkedin.com/'
+    'company/acme-{i}?trk=guest">Acme {i}</a></h4>'
+    '<div class="base-search-card__metadata"><span class="job-search-card__'
+    'location">Berlin, Berlin, Germany</span><time datetime="2025-05-01">'
+    "</time></div></div>"
+)
+# About the size of a search results page
+BODY = "".join(CARD.format(i=i) for i in range(25)).encode()
+
+SCENARIOS = ("direct", "proxy", "tunnel")
+
+PROFILES = {
+    "default": {},
+    "tuned": {
+        "DOWNLOAD_HANDLERS": {
+            "http": "job_watcher.downloader.TunedDownloadHandler",
+            "https": "job_watcher.downloader.TunedDownloadHandler",
+        },
+        "DOWNLOAD_HTTP2_ENABLED": True,
+    },
+}
+
+
+def write_certificate(directory: str) -> str:
+    """
+    Create a self-signed certificate for the stand-in server.
+    :return: Path of a PEM file with the key and the certificate
+    """
+    import datetime as dt
+
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, SERVER_HOST)])
+    now = dt.datetime.now(dt.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - dt.timedelta(days=1))
+        .not_valid_after(now + dt.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    path = Path(directory) / "server.pem"
+    path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption(),
+        )
+        + cert.public_bytes(serialization.Encoding.PEM)
+    )
+    return str(path)
+
+
+def encode(body: bytes, accept_encoding: str) -> tuple[bytes, str | None]:
+    """
+    Compress a response body with the best encoding the client accepts.
+    """
+    accepted = {e.split(";")[0].strip() for e in accept_encoding.split(",")}
+    if "zstd" in accepted:
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3).compress(body), "zstd"
+    if "br" in accepted:
+        import brotli
+
+        return brotli.compress(body, quality=5), "br"
+    if "gzip" in accepted:
+        return gzip.compress(body, compresslevel=6), "gzip"
+    return body, None
+
+
+def serve(
+    http_port: int,
+    https_port: int,
+    proxy_port: int,
+    tunnel_port: int,
+    pem_path: str,
+    latency_ms: float,
+    connect_ms: float,
+) -> None:
+    """
+    Run the stand-in server: search pages over HTTP and HTTPS (HTTP/1.1 and
+    HTTP/2), a forward proxy answering requests for any host itself, so
+    that only the client side of the proxy is measured, and a CONNECT proxy
+    tunneling to the HTTPS server whatever the target host. Responses are delayed
+    by `latency_ms` and the first request of every new connection by
+    `connect_ms` more, standing in for network round trips and TCP/TLS setup
+    through a remote proxy.
+    """
+    from twisted.internet import protocol, reactor, ssl
+    from twisted.internet.endpoints import TCP4ClientEndpoint, connectProtocol
+    from twisted.protocols.policies import ProtocolWrapper, WrappingFactory
+    from twisted.web import resource, server
+
+    class SlowStartProtocol(ProtocolWrapper):
+        def connectionMade(self):
+            super().connectionMade()
+            self.buffer = []
+            reactor.callLater(connect_ms / 1000, self.ready)
+
+        def ready(self):
+            buffer, self.buffer = self.buffer, None
+            for data in buffer:
+                super().dataReceived(data)
+
+        def dataReceived(self, data):
+            if self.buffer is not None:
+                self.buffer.append(data)
+            else:
+                super().dataReceived(data)
+
+    class SlowStartFactory(WrappingFactory):
+        protocol = SlowStartProtocol
+
+    class Relay(protocol.Protocol):
+        def __init__(self, client):
+            self.client = client
+
+        def connectionMade(self):
+            self.client.tunnel_open(self)
+
+        def dataReceived(self, data):
+            self.client.transport.write(data)
+
+        def connectionLost(self, reason):
+            self.client.transport.loseConnection()
+
+    class ConnectProxy(protocol.Protocol):
+        def connectionMade(self):
+            self.head = b""
+            self.relay = None
+            self.early = []
+
+        def dataReceived(self, data):
+            if self.relay is not None:
+                self.relay.transport.write(data)
+            elif self.head is None:
+                # Waiting for the upstream connection
+                self.early.append(data)
+            else:
+                self.head += data
+                if b"\r\n\r\n" in self.head:
+                    _, rest = self.head.split(b"\r\n\r\n", 1)
+                    self.head = None
+                    self.early.append(rest)
+                    endpoint = TCP4ClientEndpoint(reactor, SERVER_HOST, https_port)
+                    connectProtocol(endpoint, Relay(self))
+
+        def tunnel_open(self, relay):
+            self.relay = relay
+            self.transport.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+            for data in self.early:
+                if data:
+                    relay.transport.write(data)
+
+        def connectionLost(self, reason):
+            if self.relay is not None:
+                self.relay.transport.loseConnection()
+
+    class SearchPage(resource.Resource):
+        isLeaf = True
+
+        def render_GET(self, request):
+            accept_encoding = request.getHeader("accept-encoding") or ""
+            body, encoding = encode(BODY, accept_encoding)
+            request.setHeader(b"content-type", b"text/html; charset=utf-8")
+            if encoding:
+                request.setHeader(b"content-encoding", encoding.encode())
+            reactor.callLater(latency_ms / 1000, self.finish, request, body)
+            return server.NOT_DONE_YET
+
+        @staticmethod
+        def finish(request, body):
+            if not request._disconnected:
+                request.write(body)
+                request.finish()
+
+    site = server.Site(SearchPage())
+    site.log = lambda request: None
+    pem = Path(pem_path).read_bytes()
+    certificate = ssl.PrivateCertificate.loadPEM(pem)
+    options = ssl.CertificateOptions(
+        privateKey=certificate.privateKey.original,
+        certificate=certificate.original,
+        acceptableProtocols=[b"h2", b"http/1.1"],
+    )
+    reactor.listenTCP(http_port, site, interface="0.0.0.0")
+    reactor.listenSSL(
+        https_port, SlowStartFactory(site), options, interface=SERVER_HOST
+    )
+    reactor.listenTCP(proxy_port, SlowStartFactory(site), interface=SERVER_HOST)
+    reactor.listenTCP(
+        tunnel_port,
+        SlowStartFactory(protocol.Factory.forProtocol(ConnectProxy)),
+        interface=SERVER_HOST,
+    )
+    reactor.run()
+
+
+def crawl(profile: str, scenario: str, requests: int, ports: dict) -> dict:
+    """
+    Download `requests` pages with a profile in this process.
+    :return: Requests per second and bytes received
+    """
+    from scrapy import Request, Spider
+    from scrapy.crawler import CrawlerProcess
+
+    class BenchmarkSpider(Spider):
+        name = "download_benchmark"
+
+        async def start(self):
+            for i in range(requests):
+                host = PROXIED_HOSTS[i % len(PROXIED_HOSTS)]
+                if scenario == "direct":
+                    url = f"https://{SERVER_HOST}:{ports['https']}/search?start={i}"
+                    meta = {}
+                elif scenario == "proxy":
+                    url = f"http://{host}:{ports['http']}/search?start={i}"
+                    meta = {"proxy": f"http://{SERVER_HOST}:{ports['proxy']}"}
+                else:
+                    url = f"https://{host}:{ports['https']}/search?start={i}"
+                    meta = {"proxy": f"http://{SERVER_HOST}:{ports['tunnel']}"}
+                yield Request(url, meta=meta, dont_filter=True)
+
+        def parse(self, response):
+            assert b"base-search-card" in response.body
+            return None
+
+    settings = {
+        "LOG_LEVEL": "ERROR",
+        "ROBOTSTXT_OBEY": False,
+        "COOKIES_ENABLED": False,
+        "RETRY_ENABLED": False,
+        "TELNETCONSOLE_ENABLED": False,
+        "DOWNLOAD_DELAY": 0,
+        "DEFAULT_REQUEST_HEADERS": {"Accept-Encoding": "gzip, deflate, br, zstd"},
+        "CONCURRENT_REQUESTS": 32,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 8,
+        **PROFILES[profile],
+    }
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(BenchmarkSpider)
+    process.crawl(crawler)
+    started = time.perf_counter()
+    process.start()
+    elapsed = time.perf_counter() - started
+    stats = crawler.stats.get_stats()
+    responses = stats.get("response_received_count", 0)
+    return {
+        "responses": responses,
+        "errors": stats.get("downloader/exception_count", 0),
+        "requests_per_second": responses / elapsed,
+        "bytes_per_response": stats.get("downloader/response_bytes", 0)
+        / max(responses, 1),
+    }
+
+
+def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection((SERVER_HOST, port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def run_crawl(profile: str, scenario: str, requests: int, ports: dict) -> dict:
+    # A fresh interpreter per crawl, a Twisted reactor cannot be restarted
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    result = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--crawl",
+            json.dumps([profile, scenario, requests, ports]),
+        ],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--connect-ms", type=float, default=60.0)
+    parser.add_argument(
+        "--scenario",
+        choices=SCENARIOS,
+        action="append",
+        help="Scenario to run, repeatable, all by default",
+    )
+    parser.add_argument("--serve", nargs=7, help=argparse.SUPPRESS)
+    parser.add_argument("--crawl", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        *ports, pem_path, latency_ms, connect_ms = args.serve
+        serve(*map(int, ports), pem_path, float(latency_ms), float(connect_ms))
+        return
+    if args.crawl:
+        print(json.dumps(crawl(*json.loads(args.crawl))))
+        return
+
+    ports = {
+        "http": args.port,
+        "https": args.port + 1,
+        "proxy": args.port + 2,
+        "tunnel": args.port + 3,
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        pem_path = write_certificate(directory)
+        server = subprocess.Popen(
+            [sys.executable, __file__, "--serve"]
+            + [str(ports[k]) for k in ("http", "https", "proxy", "tunnel")]
+            + [pem_path, str(args.latency_ms), str(args.connect_ms)],
+            cwd=ROOT,
+        )
+        try:
+            wait_for_port(ports["tunnel"])
+            print(f"{'scenario':<8} {'profile':<8} {'req/s':>8} {'bytes/resp':>11}")
+            for scenario in args.scenario or SCENARIOS:
+                baseline = None
+                for profile in PROFILES:
+                    # Best of a few runs
+                    results = [
+                        run_crawl(profile, scenario, args.requests, ports)
+                        for _ in range(args.runs)
+                    ]
+                    best = max(results, key=lambda r: r["requests_per_second"])
+                    if best["errors"] or best["responses"] != args.requests:
+                        print(f"{scenario} {profile}: {best}", file=sys.stderr)
+                    rate = best["requests_per_second"]
+                    baseline = baseline or rate or 1.0
+                    print(
+                        f"{scenario:<8} {profile:<8} {rate:>8.0f} "
+                        f"{best['bytes_per_response']:>11.0f}  x{rate / baseline:.2f}"
+                    )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Guard the startup cost of a crawl with `python -X importtime`.
+
+Imports what `scrapy crawl linkedin_spider` loads from this project in a fresh
+interpreter, fails if the cumulative import time of the project modules is
+over budget or if a heavy dependency that should be lazy is imported at
+startup. Interpreter startup (site, encodings) is not counted.
+
+    python benchmarks/import_time.py --budget-ms 600
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+STARTUP_MODULES = [
+    "job_watcher.settings",
+    "job_watcher.pipelines",
+    "job_watcher.middlewares",
+    "job_watcher.spiders.linkedin.linkedin_spider",
+    "job_watcher.spiders.indeed.indeed_spider",
+]
+
+# Only needed by some stages, must not be imported at startup
+LAZY_MODULES = ["pandas", "numpy", "markdownify", "bs4", "zstandard", "dotenv"]
+
+PROJECT_PACKAGE = "job_watcher"
+
+LINE_REGEX = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(modules: list[str]) -> list[tuple[str, int, int, int]]:
+    """
+    Import modules in a fresh interpreter.
+    :param modules: Modules to import
+    :return: (module, self us, cumulative us, depth) for every imported module
+    """
+    env = {**os.environ, "JOB_WATCHER_FAST_STARTUP": "1"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        m = LINE_REGEX.match(line)
+        if m:
+            self_us, cumulative_us, indent, name = m.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def is_project_module(name: str) -> bool:
+    return name == PROJECT_PACKAGE or name.startswith(PROJECT_PACKAGE + ".")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=600.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        rows = measure(STARTUP_MODULES)
+        # Top level imports carry the cumulative time of everything below them
+        top_level = [r for r in rows if r[3] == 0 and is_project_module(r[0])]
+        totals.append(sum(cum for _, _, cum, _ in top_level) / 1000)
+    total_ms = min(totals)
+
+    print(f"Startup imports: {total_ms:.1f} ms (best of {args.runs})")
+    print("Slowest top level imports:")
+    top_level.sort(key=lambda r: -r[2])
+    for name, _, cumulative_us, _ in top_level[: args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    imported = {name.split(".")[0] for name, *_ in rows}
+    eager = sorted(imported.intersection(LAZY_MODULES))
+    failed = False
+    if eager:
+        print(f"FAIL: imported at startup: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
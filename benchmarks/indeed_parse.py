@@ -0,0 +1,85 @@
+"""
+Measure how fast IndeedSpider turns search API responses into job posts.
+
+Pages are built from the offline fixture in benchmarks/fixtures, repeating its
+jobs under new keys up to the spider's page size, and parsed like a crawl
+would, without any network access.
+
+    python benchmarks/indeed_parse.py --pages 50
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "indeed_search.json"
+
+sys.path.insert(0, str(ROOT))
+
+from scrapy.http import Request, TextResponse  # noqa: E402
+
+from job_watcher.items import JobPost  # noqa: E402
+from job_watcher.spiders.indeed.indeed_spider import IndeedSpider  # noqa: E402
+
+
+def build_page(fixture: dict, page: int, size: int) -> TextResponse:
+    """
+    Fill a search response with `size` jobs copied from the fixture.
+    """
+    data = copy.deepcopy(fixture)
+    templates = data["data"]["jobSearch"]["results"]
+    results = []
+    for i in range(size):
+        result = copy.deepcopy(templates[i % len(templates)])
+        result["job"]["key"] = f"{page:04x}{i:04x}{result['job']['key'][8:]}"
+        results.append(result)
+    data["data"]["jobSearch"]["results"] = results
+    return TextResponse(
+        url=IndeedSpider.api_url,
+        body=json.dumps(data).encode(),
+        encoding="utf-8",
+        request=Request(IndeedSpider.api_url, method="POST"),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    fixture = json.loads(FIXTURE.read_text())
+    pages = [build_page(fixture, p, IndeedSpider.page_size) for p in range(args.pages)]
+    size_kb = sum(len(page.body) for page in pages) / len(pages) / 1024
+
+    timings = []
+    for _ in range(args.runs):
+        spider = IndeedSpider(results_wanted=args.pages * IndeedSpider.page_size)
+        started = time.perf_counter()
+        job_posts = [
+            item
+            for page in pages
+            for item in spider.parse_job_posts(page)
+            if isinstance(item, JobPost)
+        ]
+        timings.append(time.perf_counter() - started)
+    elapsed = min(timings)
+
+    count = len(job_posts)
+    print(
+        f"Pages: {len(pages)} x {IndeedSpider.page_size} jobs, {size_kb:.0f} KiB each"
+    )
+    print(f"Parsed {count} job posts in {elapsed * 1000:.0f} ms (best of {args.runs})")
+    print(f"  {elapsed / len(pages) * 1000:8.2f} ms per page")
+    print(f"  {count / elapsed:8.0f} job posts per second")
+    with_description = sum(1 for job_post in job_posts if job_post.description)
+    with_company = sum(1 for job_post in job_posts if job_post.company_num_employees)
+    print(f"  {with_description} with description, {with_company} with company size")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Incremental rollups over collected job posts, stored in SQLite.
+
+Each rollup groups posts by a few dimensions and keeps, per group, the number
+of posts, the number of remote posts and a quantile sketch of yearly
+salaries. Rollups are updated batch by batch as items are scraped, so
+dashboards read precomputed groups instead of rescanning every post.
+
+    python -m job_watcher.aggregates aggregates.db company_name --top 20
+    python -m job_watcher.aggregates aggregates.db location -q 0.5 0.9
+"""
+
+import argparse
+import json
+import math
+from array import array
+from collections import defaultdict
+from itertools import product
+from typing import Callable, Iterable
+
+from pydantic import BaseModel
+
+from job_watcher.items import JobPost
+from job_watcher.model import CompensationInterval
+from job_watcher.sqlite import connect_sqlite
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    rollup TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    remote INTEGER NOT NULL,
+    salaries BLOB NOT NULL,
+    PRIMARY KEY (rollup, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS counted (job_id TEXT PRIMARY KEY) WITHOUT ROWID;
+"""
+
+
+def _date_posted(item: JobPost) -> list[str | None]:
+    return [item.date_posted.isoformat() if item.date_posted else None]
+
+
+def _location(item: JobPost) -> list[str | None]:
+    location = item.location.display_location() if item.location else ""
+    return [location or None]
+
+
+def _job_type(item: JobPost) -> list[str | None]:
+    # A post with several job types is counted once under each of them
+    return [job_type.name for job_type in item.job_type or ()] or [None]
+
+
+def _currency(item: JobPost) -> list[str | None]:
+    return [item.compensation.currency if item.compensation else None]
+
+
+# Dimension name -> values of an item for that dimension
+DIMENSIONS: dict[str, Callable[[JobPost], list[str | None]]] = {
+    "company_name": lambda item: [item.company_name],
+    "location": _location,
+    "site": lambda item: [item.site.value],
+    "date_posted": _date_posted,
+    "job_type": _job_type,
+    "currency": _currency,
+}
+
+# Dimensions an item can have several values of. Summing a rollup over them
+# would count such items several times, so they can't be merged away
+MULTI_VALUED = {"job_type"}
+
+# Multipliers to a yearly salary
+YEARLY_FACTORS = {
+    CompensationInterval.YEARLY: 1,
+    CompensationInterval.MONTHLY: 12,
+    CompensationInterval.WEEKLY: 52,
+    CompensationInterval.DAILY: 260,
+    CompensationInterval.HOURLY: 2080,
+}
+
+
+def yearly_salary(item: JobPost) -> float | None:
+    """
+    Middle of the advertised salary range, per year. Currencies are not
+    converted, add the `currency` dimension to a rollup to keep them apart.
+    """
+    compensation = item.compensation
+    if compensation is None:
+        return None
+    amounts = [
+        a for a in (compensation.min_amount, compensation.max_amount) if a is not None
+    ]
+    if not amounts:
+        return None
+    factor = YEARLY_FACTORS.get(compensation.interval, 1)
+    return sum(amounts) / len(amounts) * factor
+
+
+class QuantileSketch:
+    """
+    A DDSketch: positive values are counted in logarithmic buckets, so any
+    quantile is returned within `relative_accuracy` of the exact value.
+    Sketches merge by adding bucket counts and serialize to a few hundred
+    bytes for salary data.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: dict[int, int] = defaultdict(int)
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        if value <= 0:
+            return
+        self.buckets[math.ceil(math.log(value) / self.log_gamma)] += 1
+        self.count += 1
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for index, count in other.buckets.items():
+            self.buckets[index] += count
+        self.count += other.count
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Estimate a quantile.
+        :param q: Quantile between 0 and 1, e.g. 0.5 for the median
+        :return: Estimated value, None for an empty sketch
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                break
+        return 2 * self.gamma**index / (self.gamma + 1)
+
+    def to_bytes(self) -> bytes:
+        # Interleaved (bucket index, count) pairs
+        pairs = array("q")
+        for index in sorted(self.buckets):
+            pairs.extend((index, self.buckets[index]))
+        return pairs.tobytes()
+
+    @classmethod
+    def from_bytes(
+        cls, data: bytes, relative_accuracy: float = 0.01
+    ) -> "QuantileSketch":
+        sketch = cls(relative_accuracy)
+        pairs = array("q")
+        pairs.frombytes(data)
+        for index, count in zip(pairs[::2], pairs[1::2]):
+            sketch.buckets[index] = count
+            sketch.count += count
+        return sketch
+
+
+class Rollup(BaseModel):
+    key: dict[str, str | None]
+    count: int
+    remote_share: float
+    salary_count: int
+    # quantile -> yearly salary
+    salary_quantiles: dict[float, float | None] = {}
+
+
+class _Group:
+    def __init__(self, relative_accuracy: float) -> None:
+        self.count = 0
+        self.remote = 0
+        self.salaries = QuantileSketch(relative_accuracy)
+
+    def merge(self, other: "_Group") -> None:
+        self.count += other.count
+        self.remote += other.remote
+        self.salaries.merge(other.salaries)
+
+
+class AggregateStore:
+    """
+    Rollups of job posts by sets of dimensions, e.g.
+    `[("company_name", "date_posted"), ("location",)]`. Every job id is only
+    counted once, however many crawls see it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        rollups: Iterable[Iterable[str]] = (),
+        relative_accuracy: float = 0.01,
+    ) -> None:
+        self.rollups = [tuple(rollup) for rollup in rollups]
+        for rollup in self.rollups:
+            unknown = set(rollup) - set(DIMENSIONS)
+            if unknown:
+                raise ValueError(f"Unknown dimensions: {', '.join(sorted(unknown))}")
+        self.relative_accuracy = relative_accuracy
+        self.conn = connect_sqlite(path)
+        self.conn.executescript(SCHEMA)
+
+    def add(self, items: Iterable[JobPost]) -> int:
+        """
+        Fold a batch of job posts into every rollup, in one transaction.
+        :param items: Job posts, ids counted before are skipped
+        :return: Number of posts counted
+        """
+        deltas: dict[tuple[str, str], _Group] = defaultdict(
+            lambda: _Group(self.relative_accuracy)
+        )
+        counted = 0
+        with self.conn:
+            for item in items:
+                if item.id and not self._claim(item.id):
+                    continue
+                counted += 1
+                salary = yearly_salary(item)
+                for rollup in self.rollups:
+                    name = ",".join(rollup)
+                    values = [DIMENSIONS[dimension](item) for dimension in rollup]
+                    for key in product(*values):
+                        group = deltas[name, json.dumps(key)]
+                        group.count += 1
+                        group.remote += bool(item.is_remote)
+                        if salary is not None:
+                            group.salaries.add(salary)
+            for (name, key), delta in deltas.items():
+                self._merge(name, key, delta)
+        return counted
+
+    def _claim(self, job_id: str) -> bool:
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO counted (job_id) VALUES (?)", (job_id,)
+        )
+        return cursor.rowcount == 1
+
+    def _merge(self, name: str, key: str, delta: _Group) -> None:
+        row = self.conn.execute(
+            "SELECT count, remote, salaries FROM rollups WHERE rollup = ? AND key = ?",
+            (name, key),
+        ).fetchone()
+        if row:
+            delta.merge(self._group(*row))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO rollups (rollup, key, count, remote, salaries) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (name, key, delta.count, delta.remote, delta.salaries.to_bytes()),
+        )
+
+    def _group(self, count: int, remote: int, salaries: bytes) -> _Group:
+        group = _Group(self.relative_accuracy)
+        group.count = count
+        group.remote = remote
+        group.salaries = QuantileSketch.from_bytes(salaries, self.relative_accuracy)
+        return group
+
+    def stored_rollups(self) -> list[tuple[str, ...]]:
+        rows = self.conn.execute("SELECT DISTINCT rollup FROM rollups").fetchall()
+        return [tuple(row[0].split(",")) for row in rows]
+
+    def query(
+        self,
+        dimensions: Iterable[str],
+        *,
+        where: dict[str, str | None] | None = None,
+        quantiles: Iterable[float] = (0.5,),
+        limit: int | None = None,
+    ) -> list[Rollup]:
+        """
+        Read groups by some dimensions, largest first. The groups are merged
+        from the smallest stored rollup covering the requested dimensions and
+        filters, e.g. `company_name` alone can be read from a
+        `company_name,date_posted` rollup. Rollups with a multi-valued
+        dimension that is not requested are not used.
+        :param dimensions: Dimensions to group by
+        :param where: Only count groups whose dimensions have these values
+        :param quantiles: Salary quantiles to estimate
+        :param limit: Maximum number of groups
+        :return: Groups with their counts, remote share and salary quantiles
+        """
+        dimensions = tuple(dimensions)
+        where = where or {}
+        needed = set(dimensions) | set(where)
+        candidates = [
+            r
+            for r in self.stored_rollups()
+            if needed <= set(r) and not (set(r) - needed) & MULTI_VALUED
+        ]
+        if not candidates:
+            raise ValueError(f"No rollup covers {', '.join(sorted(needed))}")
+        rollup = min(candidates, key=len)
+
+        groups: dict[tuple, _Group] = defaultdict(
+            lambda: _Group(self.relative_accuracy)
+        )
+        rows = self.conn.execute(
+            "SELECT key, count, remote, salaries FROM rollups WHERE rollup = ?",
+            (",".join(rollup),),
+        )
+        for key, count, remote, salaries in rows:
+            values = dict(zip(rollup, json.loads(key)))
+            if any(values[d] != v for d, v in where.items()):
+                continue
+            group_key = tuple(values[d] for d in dimensions)
+            groups[group_key].merge(self._group(count, remote, salaries))
+
+        ranked = sorted(groups.items(), key=lambda kv: -kv[1].count)[:limit]
+        return [
+            Rollup(
+                key=dict(zip(dimensions, key)),
+                count=group.count,
+                remote_share=group.remote / group.count,
+                salary_count=group.salaries.count,
+                salary_quantiles={q: group.salaries.quantile(q) for q in quantiles},
+            )
+            for key, group in ranked
+        ]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def parse_rollups(value: str) -> list[tuple[str, ...]]:
+    """
+    Parse rollups written like `company_name,date_posted;location`.
+    """
+    return [
+        tuple(d.strip() for d in rollup.split(",") if d.strip())
+        for rollup in value.split(";")
+        if rollup.strip()
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("store", help="Path to the aggregates database")
+    parser.add_argument("dimensions", nargs="+", choices=sorted(DIMENSIONS))
+    parser.add_argument(
+        "-w",
+        "--where",
+        action="append",
+        default=[],
+        metavar="DIMENSION=VALUE",
+        help="Only count groups with this value, repeatable",
+    )
+    parser.add_argument("-q", "--quantiles", type=float, nargs="+", default=[0.5])
+    parser.add_argument("-n", "--top", type=int, default=20)
+    args = parser.parse_args()
+
+    where = dict(condition.split("=", 1) for condition in args.where)
+    store = AggregateStore(args.store)
+    rollups = store.query(
+        args.dimensions, where=where, quantiles=args.quantiles, limit=args.top
+    )
+    for rollup in rollups:
+        key = " / ".join(str(value) for value in rollup.key.values())
+        salaries = "  ".join(
+            f"p{q * 100:g}={value:,.0f}"
+            for q, value in rollup.salary_quantiles.items()
+            if value is not None
+        )
+        print(
+            f"{rollup.count:8d}  remote {rollup.remote_share:4.0%}  {key}  {salaries}"
+        )
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
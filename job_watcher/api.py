@@ -0,0 +1,149 @@
+"""
+Embed the watcher in another application.
+
+    async for job_post in stream_job_posts(LinkedinParams(search_term="rust")):
+        ...
+
+Crawls run in-process on a Twisted reactor living in a background thread.
+Scraped items are handed over through a bounded asyncio queue: when the
+consumer falls behind, the item pipeline waits for room in the queue instead
+of buffering everything in memory.
+"""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Iterable
+
+from scrapy import signals
+from scrapy.settings import Settings
+
+from job_watcher.items import JobPost
+from job_watcher.spiders.linkedin.model import LinkedinParams
+
+_reactor = None
+_reactor_lock = threading.Lock()
+
+_DONE = object()
+
+
+def _run_reactor(ready: threading.Event) -> None:
+    from scrapy.utils.reactor import install_reactor
+
+    # The reactor gets its own event loop, separate from the caller's loop
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    install_reactor("twisted.internet.asyncioreactor.AsyncioSelectorReactor")
+    from twisted.internet import reactor
+
+    reactor.callWhenRunning(ready.set)
+    reactor.run(installSignalHandlers=False)
+
+
+def get_reactor():
+    """
+    Start the shared reactor thread on first use.
+    :return: The running reactor
+    """
+    global _reactor
+    with _reactor_lock:
+        if _reactor is None:
+            ready = threading.Event()
+            thread = threading.Thread(
+                target=_run_reactor, args=(ready,), name="job-watcher", daemon=True
+            )
+            thread.start()
+            ready.wait()
+            from twisted.internet import reactor
+
+            _reactor = reactor
+    return _reactor
+
+
+def get_settings(overrides: dict[str, Any] | None = None) -> Settings:
+    settings = Settings()
+    settings.setmodule("job_watcher.settings", priority="project")
+    # Items are streamed to the caller instead of written to job_posts.csv
+    pipelines = dict(settings.getdict("ITEM_PIPELINES"))
+    pipelines.pop("job_watcher.pipelines.JobPostPipeline", None)
+    settings.set("ITEM_PIPELINES", pipelines, priority="project")
+    if overrides:
+        settings.update(overrides, priority="cmdline")
+    return settings
+
+
+async def stream_job_posts(
+    params: LinkedinParams | Iterable[LinkedinParams],
+    *,
+    settings: dict[str, Any] | None = None,
+    max_queue_size: int = 100,
+) -> AsyncIterator[JobPost]:
+    """
+    Crawl LinkedIn in-process and yield job posts as they are scraped.
+    :param params: One or more searches, crawled concurrently
+    :param settings: Scrapy settings overriding the project settings
+    :param max_queue_size: Items buffered before the crawl waits for the consumer
+    :return: Async iterator of validated job posts
+    """
+    from scrapy.crawler import CrawlerRunner
+    from scrapy.utils.defer import maybe_deferred_to_future
+    from twisted.internet.defer import Deferred, DeferredList
+
+    from job_watcher.spiders.linkedin.linkedin_spider import LinkedinSpider
+
+    params_list = [params] if isinstance(params, LinkedinParams) else list(params)
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+    reactor = get_reactor()
+    state = {"closed": False, "runner": None}
+
+    def put(value) -> asyncio.Future:
+        return asyncio.run_coroutine_threadsafe(queue.put(value), loop)
+
+    async def on_item_scraped(item):
+        if state["closed"]:
+            return
+        d = Deferred()
+        put(item).add_done_callback(lambda _: reactor.callFromThread(d.callback, None))
+        await maybe_deferred_to_future(d)
+
+    def on_finished(results):
+        errors = [failure for success, failure in results if not success]
+        put((_DONE, errors))
+
+    def start():
+        if state["closed"]:
+            return
+        runner = CrawlerRunner(get_settings(settings))
+        state["runner"] = runner
+        crawls = []
+        for search in params_list:
+            crawler = runner.create_crawler(LinkedinSpider)
+            crawler.signals.connect(on_item_scraped, signal=signals.item_scraped)
+            kwargs = search.model_dump(include=set(LinkedinParams.model_fields))
+            crawls.append(runner.crawl(crawler, **kwargs))
+        DeferredList(crawls, consumeErrors=True).addCallback(on_finished)
+
+    def stop():
+        # Runs on the reactor thread after start(), so the runner is set
+        # unless start() saw the consumer was already gone
+        if state["runner"] is not None:
+            state["runner"].stop()
+
+    reactor.callFromThread(start)
+    finished = False
+    try:
+        while True:
+            value = await queue.get()
+            if isinstance(value, tuple) and value[0] is _DONE:
+                finished = True
+                errors = value[1]
+                if errors:
+                    errors[0].raiseException()
+                return
+            yield value
+    finally:
+        if not finished:
+            # The consumer stopped early, stop the crawls and unblock the pipeline
+            state["closed"] = True
+            reactor.callFromThread(stop)
+            while not queue.empty():
+                queue.get_nowait()
@@ -0,0 +1,72 @@
+import time
+from collections import defaultdict
+
+
+class CrawlBudget:
+    """
+    Tracks how much of a crawl's budget is used.
+
+    Items are committed per query as soon as they are scheduled, so jobs whose
+    details are still in flight count against `max_items` and no more pages
+    are requested once the budget is covered. Requests, response bytes and
+    wall-clock time are hard limits: once one is hit nothing new is
+    downloaded.
+    """
+
+    def __init__(
+        self,
+        max_items: int | None = None,
+        max_requests: int | None = None,
+        max_bytes: int | None = None,
+        max_seconds: float | None = None,
+    ) -> None:
+        self.max_items = max_items
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.deadline = time.monotonic() + max_seconds if max_seconds else None
+        self.committed: dict[str, int] = defaultdict(int)
+        self.requests = 0
+        self.bytes = 0
+
+    @property
+    def committed_items(self) -> int:
+        return sum(self.committed.values())
+
+    @property
+    def items_exhausted(self) -> bool:
+        return self.max_items is not None and self.committed_items >= self.max_items
+
+    def commit(self, query_tag: str, count: int = 1) -> bool:
+        """
+        Reserve budget for an item found by a query.
+        :param query_tag: Query that found the item
+        :param count: Number of items
+        :return: False if the item budget is already used up
+        """
+        if self.items_exhausted:
+            return False
+        self.committed[query_tag] += count
+        return True
+
+    def record_request(self) -> None:
+        self.requests += 1
+
+    def record_response(self, size: int) -> None:
+        self.bytes += size
+
+    @property
+    def exhausted_reason(self) -> str | None:
+        """
+        Name of the hard limit that was hit, if any.
+        """
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            return "max_requests"
+        if self.max_bytes is not None and self.bytes >= self.max_bytes:
+            return "max_bytes"
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return "deadline"
+        return None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.exhausted_reason is not None
@@ -0,0 +1,251 @@
+"""
+Crash-safe checkpoints of a LinkedinSpider crawl.
+
+The crawl state (spider arguments, per-query page cursors, jobs waiting for
+their detail page and the ids of emitted items) is written to an append-only
+JSON lines journal, fsynced every few seconds. Losing the tail of the journal
+in a crash only rewinds the crawl a little: every record depends on earlier
+ones only. The journal is removed once the crawl finishes with nothing left
+to do, and a crawl only resumes it when asked to, with CRAWL_CHECKPOINT_RESUME
+or:
+
+    scrapy crawl linkedin_spider -a search_term=rust -s CRAWL_CHECKPOINT_PATH=rust.ckpt
+    python -m job_watcher.checkpoint rust.ckpt  # resume after a crash
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Any
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCursor(BaseModel):
+    params: dict[str, Any]
+    # start offset of the next search page to fetch
+    start: int
+
+
+class PendingJob(BaseModel):
+    job_id: str
+    job_post: dict[str, Any]
+    query_tags: list[str] = []
+
+
+class CrawlState(BaseModel):
+    params: dict[str, Any] | None = None
+    cursors: dict[str, QueryCursor] = {}
+    # Jobs found on a search page but not emitted yet, keyed by JobPost.id
+    pending: dict[str, PendingJob] = {}
+    # JobPost.id -> job id of the emitted items, their data is in the outputs
+    emitted: dict[str, str] = {}
+
+    @property
+    def seen_job_ids(self) -> set[str]:
+        return {job.job_id for job in self.pending.values()} | set(
+            self.emitted.values()
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return self.params is None
+
+    @property
+    def is_complete(self) -> bool:
+        """Every query ran to its end and every job found was emitted."""
+        return not self.cursors and not self.pending
+
+
+class CrawlCheckpoint:
+    def __init__(
+        self, path: str, flush_interval: float = 5.0, resume: bool = False
+    ) -> None:
+        """
+        :param path: Journal file
+        :param flush_interval: Seconds between fsyncs of the journal
+        :param resume: Continue the crawl of an existing journal, otherwise
+            the journal is replaced
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.state = self.load(path) if resume else CrawlState()
+        self.is_resumed = not self.state.is_empty
+        if not resume and os.path.exists(path):
+            logger.warning(
+                f"Replacing the crawl checkpoint {path}, set "
+                f"CRAWL_CHECKPOINT_RESUME to resume it instead"
+            )
+        self.file = None
+        # Start from a clean journal, without a torn last record
+        self.compact()
+        self.last_flush = time.monotonic()
+
+    @staticmethod
+    def load(path: str) -> CrawlState:
+        """
+        Replay a journal.
+        :param path: Journal file, missing files give an empty state
+        :return: State at the last complete record
+        """
+        state = CrawlState()
+        if not os.path.exists(path):
+            return state
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write at the end of the journal
+                    break
+                CrawlCheckpoint.apply(state, record)
+        return state
+
+    @staticmethod
+    def apply(state: CrawlState, record: dict[str, Any]) -> None:
+        kind = record["type"]
+        if kind == "params":
+            state.params = record["params"]
+        elif kind == "cursor":
+            state.cursors[record["query"]] = QueryCursor(
+                params=record["params"], start=record["start"]
+            )
+        elif kind == "query_done":
+            state.cursors.pop(record["query"], None)
+        elif kind == "pending":
+            state.pending[record["id"]] = PendingJob(
+                job_id=record["job_id"],
+                job_post=record["job_post"],
+                query_tags=record["query_tags"],
+            )
+        elif kind == "done":
+            state.pending.pop(record["id"], None)
+            state.emitted[record["id"]] = record["job_id"]
+
+    def write(self, record: dict[str, Any]) -> None:
+        self.apply(self.state, record)
+        self.file.write(json.dumps(record) + "\n")
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_flush = time.monotonic()
+
+    def start(self, params: dict[str, Any]) -> None:
+        """
+        Record the spider arguments of a new crawl, or check that a resumed
+        crawl runs with the arguments it was started with.
+        :param params: Spider arguments, as JSON data
+        :raise ValueError: If the journal belongs to a crawl with other arguments
+        """
+        if self.state.params is None:
+            self.write({"type": "params", "params": params})
+            self.flush()
+        elif self.state.params != params:
+            raise ValueError(
+                f"{self.path} checkpoints a crawl with other arguments: "
+                f"{self.state.params}"
+            )
+
+    def cursor(self, query_tag: str, params: dict[str, Any], start: int) -> None:
+        self.write(
+            {"type": "cursor", "query": query_tag, "params": params, "start": start}
+        )
+
+    def query_done(self, query_tag: str) -> None:
+        self.write({"type": "query_done", "query": query_tag})
+
+    def pending(
+        self, job_id: str, job_post: dict[str, Any], query_tags: list[str]
+    ) -> None:
+        self.write(
+            {
+                "type": "pending",
+                "id": job_post["id"],
+                "job_id": job_id,
+                "job_post": job_post,
+                "query_tags": query_tags,
+            }
+        )
+
+    def done(self, item_id: str) -> None:
+        job = self.state.pending.get(item_id)
+        if job is not None:
+            self.write({"type": "done", "id": item_id, "job_id": job.job_id})
+
+    def compact(self) -> None:
+        """
+        Rewrite the journal with only the records needed for the current state.
+        """
+        if self.file is not None:
+            self.file.close()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            records = []
+            if self.state.params is not None:
+                records.append({"type": "params", "params": self.state.params})
+            for tag, cursor in self.state.cursors.items():
+                records.append(
+                    {
+                        "type": "cursor",
+                        "query": tag,
+                        "params": cursor.params,
+                        "start": cursor.start,
+                    }
+                )
+            for item_id, job in self.state.pending.items():
+                records.append({"type": "pending", "id": item_id, **job.model_dump()})
+            for item_id, job_id in self.state.emitted.items():
+                records.append({"type": "done", "id": item_id, "job_id": job_id})
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def close(self, reason: str) -> None:
+        """
+        Close the journal, and remove it if the crawl finished with nothing
+        left to resume.
+        :param reason: Reason the spider closed
+        """
+        self.flush()
+        self.file.close()
+        if self.is_finished(reason):
+            os.remove(self.path)
+
+    def is_finished(self, reason: str) -> bool:
+        return reason == "finished" and self.state.is_complete
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume a checkpointed crawl.")
+    parser.add_argument("checkpoint", help="Checkpoint journal of the crawl")
+    args = parser.parse_args()
+
+    state = CrawlCheckpoint.load(args.checkpoint)
+    if state.is_empty:
+        parser.error(f"{args.checkpoint} is not a crawl checkpoint")
+
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    from job_watcher.spiders.linkedin.linkedin_spider import LinkedinSpider
+
+    settings = get_project_settings()
+    settings.set("CRAWL_CHECKPOINT_PATH", args.checkpoint, priority="cmdline")
+    settings.set("CRAWL_CHECKPOINT_RESUME", True, priority="cmdline")
+    process = CrawlerProcess(settings)
+    process.crawl(LinkedinSpider, **state.params)
+    process.start()
+
+
+if __name__ == "__main__":
+    main()
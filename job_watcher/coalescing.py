@@ -0,0 +1,40 @@
+from typing import Any, Hashable
+
+
+class RequestCoalescer:
+    """
+    Tracks in-flight requests by key, e.g. a job id, so that every caller
+    asking for the same resource while it is being fetched shares a single
+    download. Callers register a context when joining and get all of them
+    back once the response is in.
+    """
+
+    def __init__(self) -> None:
+        self.waiters: dict[Hashable, list[Any]] = {}
+
+    def join(self, key: Hashable, context: Any = None) -> bool:
+        """
+        Register interest in a key.
+        :param key: Key of the resource
+        :param context: Caller context handed back by `resolve`
+        :return: True if the caller is the first one and must issue the request
+        """
+        first = key not in self.waiters
+        contexts = self.waiters.setdefault(key, [])
+        if context is not None and context not in contexts:
+            contexts.append(context)
+        return first
+
+    def resolve(self, key: Hashable) -> list[Any]:
+        """
+        Mark the request for a key as done.
+        :param key: Key of the resource
+        :return: Contexts of every caller that joined, in order
+        """
+        return self.waiters.pop(key, [])
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.waiters
+
+    def __len__(self) -> int:
+        return len(self.waiters)
@@ -0,0 +1,87 @@
+import json
+import time
+
+from pydantic import BaseModel
+
+from job_watcher.items import JobPost
+from job_watcher.sqlite import DEFAULT_TIMEOUT, connect_sqlite
+
+
+class CompanyProfile(BaseModel):
+    industry: str | None = None
+    num_employees: str | None = None
+    description: str | None = None
+    addresses: str | None = None
+    url_direct: str | None = None
+
+    def fill(self, item: JobPost) -> None:
+        """
+        Set the company fields of a job post that are still empty.
+        """
+        fields = {
+            "company_industry": self.industry,
+            "company_num_employees": self.num_employees,
+            "company_description": self.description,
+            "company_addresses": self.addresses,
+            "company_url_direct": self.url_direct,
+        }
+        for field, value in fields.items():
+            if value and not getattr(item, field):
+                setattr(item, field, value)
+
+
+class CompanyCache:
+    """
+    Company profiles by company page URL, backed by SQLite so that crawler
+    processes on the same machine share it. Profiles expire after `ttl`
+    seconds. Pages that could not be read are cached as empty profiles for
+    `negative_ttl` seconds, so they are not fetched again for every job.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float,
+        negative_ttl: float,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.conn = connect_sqlite(path, timeout, autocommit=True)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS company_profiles ("
+            "url TEXT PRIMARY KEY, expires_at REAL NOT NULL, profile TEXT NOT NULL)"
+        )
+
+    def get(self, url: str) -> CompanyProfile | None:
+        """
+        Look up a company.
+        :param url: Company page URL
+        :return: The profile, empty if the page was unavailable, None if it is
+            missing or expired
+        """
+        row = self.conn.execute(
+            "SELECT profile FROM company_profiles WHERE url = ? AND expires_at > ?",
+            (url, time.time()),
+        ).fetchone()
+        return CompanyProfile.model_validate(json.loads(row[0])) if row else None
+
+    def put(self, url: str, profile: CompanyProfile | None) -> None:
+        """
+        Store a company.
+        :param url: Company page URL
+        :param profile: Profile read from the page, None if it was unavailable
+        """
+        ttl = self.ttl if profile is not None else self.negative_ttl
+        profile = profile or CompanyProfile()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO company_profiles (url, expires_at, profile) "
+            "VALUES (?, ?, ?)",
+            (url, time.time() + ttl, profile.model_dump_json(exclude_none=True)),
+        )
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM company_profiles").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
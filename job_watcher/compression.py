@@ -0,0 +1,163 @@
+import datetime as dt
+from collections import deque
+from typing import Iterable, Iterator
+
+import zstandard
+
+from job_watcher.sqlite import connect_sqlite
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS descriptions (
+    job_id TEXT PRIMARY KEY,
+    dict_id INTEGER REFERENCES dictionaries (id),
+    data BLOB NOT NULL
+);
+"""
+
+
+class LazyDescription:
+    """
+    A compressed description that is only decompressed when it is read.
+    """
+
+    __slots__ = ("store", "dict_id", "data", "_text")
+
+    def __init__(self, store: "DescriptionStore", dict_id: int | None, data: bytes):
+        self.store = store
+        self.dict_id = dict_id
+        self.data = data
+        self._text = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = self.store.decompress(self.dict_id, self.data)
+        return self._text
+
+    def __len__(self) -> int:
+        return len(str(self))
+
+    def __repr__(self) -> str:
+        return f"<LazyDescription {len(self.data)} bytes compressed>"
+
+
+class DescriptionStore:
+    """
+    Stores descriptions compressed with zstd using a dictionary trained on
+    recent descriptions, so the boilerplate shared between posts (EEO
+    statements, benefits) is only paid for once.
+
+    The dictionary is retrained every `retrain_every` descriptions. Old
+    dictionaries are kept so every row can still be decoded.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        level: int = 9,
+        dict_size: int = 112_640,
+        retrain_every: int = 5_000,
+        sample_size: int = 2_000,
+        min_samples: int = 200,
+    ) -> None:
+        self.conn = connect_sqlite(path)
+        self.conn.executescript(SCHEMA)
+        self.level = level
+        self.dict_size = dict_size
+        self.retrain_every = retrain_every
+        self.min_samples = min_samples
+        self.samples: deque[bytes] = deque(maxlen=sample_size)
+        self.since_trained = 0
+        self.decompressors: dict[int | None, zstandard.ZstdDecompressor] = {}
+
+        row = self.conn.execute(
+            "SELECT id, data FROM dictionaries ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        if row:
+            self._use_dictionary(row[0], zstandard.ZstdCompressionDict(row[1]))
+        else:
+            self._use_dictionary(None, None)
+
+    def _use_dictionary(self, dict_id, dictionary) -> None:
+        self.dict_id = dict_id
+        self.compressor = zstandard.ZstdCompressor(
+            level=self.level, dict_data=dictionary
+        )
+
+    def train(self) -> int:
+        """
+        Train a new dictionary on the recent samples and use it from now on.
+        :return: Id of the new dictionary
+        """
+        dictionary = zstandard.train_dictionary(
+            self.dict_size, list(self.samples), level=self.level
+        )
+        with self.conn:
+            dict_id = self.conn.execute(
+                "INSERT INTO dictionaries (data, created_at) VALUES (?, ?)",
+                (
+                    dictionary.as_bytes(),
+                    dt.datetime.now(dt.timezone.utc).isoformat(),
+                ),
+            ).lastrowid
+        self._use_dictionary(dict_id, dictionary)
+        self.since_trained = 0
+        return dict_id
+
+    def put_many(self, descriptions: Iterable[tuple[str, str]]) -> None:
+        """
+        Compress and store descriptions in one transaction.
+        :param descriptions: (job_id, description) pairs
+        """
+        rows = []
+        for job_id, text in descriptions:
+            raw = text.encode("utf-8")
+            self.samples.append(raw)
+            self.since_trained += 1
+            rows.append((job_id, self.dict_id, self.compressor.compress(raw)))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO descriptions (job_id, dict_id, data) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+
+        untrained = self.dict_id is None and len(self.samples) >= self.min_samples
+        if untrained or self.since_trained >= self.retrain_every:
+            self.train()
+
+    def decompress(self, dict_id: int | None, data: bytes | memoryview) -> str:
+        decompressor = self.decompressors.get(dict_id)
+        if decompressor is None:
+            dictionary = None
+            if dict_id is not None:
+                (raw,) = self.conn.execute(
+                    "SELECT data FROM dictionaries WHERE id = ?", (dict_id,)
+                ).fetchone()
+                dictionary = zstandard.ZstdCompressionDict(raw)
+            decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+            self.decompressors[dict_id] = decompressor
+        return decompressor.decompress(data).decode("utf-8")
+
+    def get(self, job_id: str) -> LazyDescription | None:
+        row = self.conn.execute(
+            "SELECT dict_id, data FROM descriptions WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return LazyDescription(self, row[0], row[1])
+
+    def __iter__(self) -> Iterator[tuple[str, LazyDescription]]:
+        cursor = self.conn.execute("SELECT job_id, dict_id, data FROM descriptions")
+        for job_id, dict_id, data in cursor:
+            yield job_id, LazyDescription(self, dict_id, data)
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM descriptions").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,216 @@
+import datetime as dt
+from typing import Any, Iterable
+from urllib.parse import urlparse
+
+from job_watcher.items import JobPost
+from job_watcher.sqlite import connect_sqlite
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    id {pk},
+    name TEXT NOT NULL,
+    url TEXT NOT NULL,
+    UNIQUE (name, url)
+);
+CREATE TABLE IF NOT EXISTS locations (
+    id {pk},
+    city TEXT NOT NULL,
+    state TEXT NOT NULL,
+    country TEXT NOT NULL,
+    UNIQUE (city, state, country)
+);
+CREATE TABLE IF NOT EXISTS job_posts (
+    id TEXT PRIMARY KEY,
+    site TEXT NOT NULL,
+    title TEXT NOT NULL,
+    job_url TEXT NOT NULL,
+    job_url_direct TEXT,
+    company_id BIGINT REFERENCES companies (id),
+    location_id BIGINT REFERENCES locations (id),
+    date_posted {date},
+    is_remote BOOLEAN,
+    description TEXT,
+    data TEXT NOT NULL,
+    first_seen {timestamp} NOT NULL,
+    last_seen {timestamp} NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_posts_last_seen ON job_posts (last_seen);
+"""
+
+UPSERT_JOB_POST = """
+INSERT INTO job_posts (
+    id, site, title, job_url, job_url_direct, company_id, location_id,
+    date_posted, is_remote, description, data, first_seen, last_seen
+) VALUES ({params})
+ON CONFLICT (id) DO UPDATE SET
+    site = excluded.site,
+    title = excluded.title,
+    job_url = excluded.job_url,
+    job_url_direct = excluded.job_url_direct,
+    company_id = excluded.company_id,
+    location_id = excluded.location_id,
+    date_posted = excluded.date_posted,
+    is_remote = excluded.is_remote,
+    description = excluded.description,
+    data = excluded.data,
+    last_seen = excluded.last_seen
+"""
+
+
+class JobPostDatabase:
+    """
+    Stores job posts in SQLite or Postgres, upserting them in batches keyed by
+    `JobPost.id`. Companies and locations are kept in their own tables.
+
+    Use `from_url` with `sqlite:///path/to.db` or `postgresql://...`.
+    """
+
+    placeholder = "?"
+    column_types = {"pk": "INTEGER PRIMARY KEY", "date": "TEXT", "timestamp": "TEXT"}
+
+    def __init__(self, conn: Any) -> None:
+        self.conn = conn
+        self.company_ids: dict[tuple[str, str], int] = {}
+        self.location_ids: dict[tuple[str, str, str], int] = {}
+
+    @classmethod
+    def from_url(cls, url: str) -> "JobPostDatabase":
+        parsed = urlparse(url)
+        if parsed.scheme == "sqlite":
+            # sqlite:///relative.db or sqlite:////absolute.db
+            return SqliteJobPostDatabase(url.split("sqlite:///", 1)[1] or ":memory:")
+        if parsed.scheme in ("postgres", "postgresql"):
+            return PostgresJobPostDatabase(url)
+        raise ValueError(f"Unsupported database url: {url}")
+
+    def create_tables(self) -> None:
+        cursor = self.conn.cursor()
+        for statement in SCHEMA.format(**self.column_types).split(";"):
+            if statement.strip():
+                cursor.execute(statement)
+        self.conn.commit()
+
+    def upsert(self, items: Iterable[JobPost], seen_at: dt.datetime | None = None):
+        """
+        Insert or update a batch of job posts in one transaction.
+        :param items: Job posts to store, items without id are skipped
+        :param seen_at: Timestamp recorded as `last_seen` (and `first_seen` for
+            new posts), defaults to now
+        """
+        # Later items win when the same id shows up twice in a batch
+        items = list({item.id: item for item in items if item.id}.values())
+        if not items:
+            return
+        seen_at = (seen_at or dt.datetime.now(dt.timezone.utc)).isoformat()
+
+        try:
+            cursor = self.conn.cursor()
+            company_ids = self._get_ids(
+                cursor,
+                "companies",
+                ("name", "url"),
+                self.company_ids,
+                [self._company_key(item) for item in items],
+            )
+            location_ids = self._get_ids(
+                cursor,
+                "locations",
+                ("city", "state", "country"),
+                self.location_ids,
+                [self._location_key(item) for item in items],
+            )
+            rows = [
+                (
+                    item.id,
+                    item.site.value,
+                    item.title,
+                    item.job_url,
+                    item.job_url_direct,
+                    company_ids.get(self._company_key(item)),
+                    location_ids.get(self._location_key(item)),
+                    item.date_posted.isoformat() if item.date_posted else None,
+                    item.is_remote,
+                    item.description,
+                    item.model_dump_json(),
+                    seen_at,
+                    seen_at,
+                )
+                for item in items
+            ]
+            params = ", ".join([self.placeholder] * len(rows[0]))
+            cursor.executemany(UPSERT_JOB_POST.format(params=params), rows)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            # Ids cached during the failed transaction may not exist
+            self.company_ids.clear()
+            self.location_ids.clear()
+            raise
+
+    def _get_ids(self, cursor, table, columns, cache, keys) -> dict[tuple, int]:
+        missing = {key for key in keys if key is not None and key not in cache}
+        if missing:
+            params = ", ".join([self.placeholder] * len(columns))
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({params}) "
+                f"ON CONFLICT DO NOTHING",
+                sorted(missing),
+            )
+            # Look the new rows up by their first column in one statement
+            first_values = sorted({key[0] for key in missing})
+            params = ", ".join([self.placeholder] * len(first_values))
+            cursor.execute(
+                f"SELECT id, {', '.join(columns)} FROM {table} "
+                f"WHERE {columns[0]} IN ({params})",
+                first_values,
+            )
+            for row_id, *key in cursor.fetchall():
+                cache[tuple(key)] = row_id
+        return cache
+
+    @staticmethod
+    def _company_key(item: JobPost) -> tuple[str, str] | None:
+        if not item.company_name and not item.company_url:
+            return None
+        return item.company_name or "", item.company_url or ""
+
+    @staticmethod
+    def _location_key(item: JobPost) -> tuple[str, str, str] | None:
+        location = item.location
+        if location is None:
+            return None
+        country = location.country
+        if country is not None and not isinstance(country, str):
+            country = country.name
+        return location.city or "", location.state or "", country or ""
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> list[tuple]:
+        cursor = self.conn.cursor()
+        cursor.execute(sql, tuple(params))
+        return cursor.fetchall()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class SqliteJobPostDatabase(JobPostDatabase):
+    def __init__(self, path: str) -> None:
+        conn = connect_sqlite(path)
+        conn.execute("PRAGMA foreign_keys=ON")
+        super().__init__(conn)
+
+
+class PostgresJobPostDatabase(JobPostDatabase):
+    placeholder = "%s"
+    column_types = {
+        "pk": "BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY",
+        "date": "DATE",
+        "timestamp": "TIMESTAMPTZ",
+    }
+
+    def __init__(self, url: str) -> None:
+        try:
+            import psycopg
+        except ImportError as e:
+            raise ImportError("Postgres support requires `psycopg`") from e
+        super().__init__(psycopg.connect(url))
@@ -0,0 +1,181 @@
+import re
+import zlib
+
+import numpy as np
+
+from job_watcher.sqlite import connect_sqlite
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+WORD_REGEX = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS params (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS posts (
+    key TEXT PRIMARY KEY,
+    cluster TEXT NOT NULL,
+    signature BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    band_key BLOB NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (band, band_key, key)
+) WITHOUT ROWID;
+"""
+
+
+class NearDuplicateIndex:
+    """
+    Clusters near-duplicate descriptions incrementally with MinHash and LSH
+    banding. Lookups only touch the LSH buckets of the new description, so the
+    cost does not grow with the number of indexed posts.
+
+    Each indexed key belongs to a cluster named after the first key added to it.
+    Signatures and LSH buckets are stored in SQLite, in memory unless `path` is
+    given, and read per band key, so the index does not have to fit in memory.
+    Each `add` is one short write transaction, so crawler processes can share
+    an index file.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        num_perm: int = 128,
+        bands: int = 16,
+        threshold: float = 0.8,
+        shingle_size: int = 5,
+        seed: int = 1,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+        self.conn = connect_sqlite(path, autocommit=True)
+        self.conn.executescript(SCHEMA)
+        # Signatures are only comparable when computed with the same hashes
+        params = {
+            "num_perm": num_perm,
+            "bands": bands,
+            "shingle_size": shingle_size,
+            "seed": seed,
+        }
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO params (name, value) VALUES (?, ?)",
+            params.items(),
+        )
+        stored = dict(self.conn.execute("SELECT name, value FROM params"))
+        if stored != params:
+            raise ValueError(f"{path} was built with different parameters: {stored}")
+
+    def shingles(self, text: str) -> set[bytes]:
+        words = WORD_REGEX.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            return {" ".join(words).encode()} if words else set()
+        return {
+            " ".join(words[i : i + self.shingle_size]).encode()
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of a text.
+        :param text: Text to hash
+        :return: Array of `num_perm` uint32 hash values
+        """
+        hashes = np.fromiter(
+            (zlib.crc32(shingle) for shingle in self.shingles(text)), dtype=np.uint64
+        )
+        if not hashes.size:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        permuted = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [
+            signature[i * self.rows : (i + 1) * self.rows].tobytes()
+            for i in range(self.bands)
+        ]
+
+    def similarity(self, signature: np.ndarray, other: bytes) -> float:
+        return float(np.mean(signature == np.frombuffer(other, dtype=np.uint32)))
+
+    def candidates(self, band_keys: list[bytes]) -> dict[str, tuple[str, bytes]]:
+        """
+        Find the indexed texts sharing at least one band with a signature.
+        :param band_keys: Band keys of the signature
+        :return: Key -> (cluster id, signature) of the candidates
+        """
+        candidates = {}
+        for band, band_key in enumerate(band_keys):
+            rows = self.conn.execute(
+                "SELECT p.key, p.cluster, p.signature FROM bands b "
+                "JOIN posts p ON p.key = b.key WHERE b.band = ? AND b.band_key = ?",
+                (band, band_key),
+            )
+            for key, cluster, signature in rows:
+                candidates[key] = (cluster, signature)
+        return candidates
+
+    def add(self, key: str, text: str) -> str:
+        """
+        Index a text and assign it to a cluster.
+        :param key: Unique key of the text, e.g. the job id
+        :param text: Text to index
+        :return: Cluster id, the key of the first text of the cluster
+        """
+        cluster_id = self.cluster(key)
+        if cluster_id is not None:
+            return cluster_id
+
+        signature = self.signature(text)
+        band_keys = self.band_keys(signature)
+        # Lookup and insert must not interleave with another process adding
+        # the same key or a near-duplicate of it
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            cluster_id = self.cluster(key)
+            if cluster_id is None:
+                cluster_id = self._add(key, signature, band_keys)
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return cluster_id
+
+    def cluster(self, key: str) -> str | None:
+        row = self.conn.execute(
+            "SELECT cluster FROM posts WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _add(self, key: str, signature: np.ndarray, band_keys: list[bytes]) -> str:
+        cluster_id, best_similarity = key, self.threshold
+        for cluster, other in self.candidates(band_keys).values():
+            similarity = self.similarity(signature, other)
+            if similarity >= best_similarity:
+                cluster_id, best_similarity = cluster, similarity
+
+        self.conn.execute(
+            "INSERT INTO posts (key, cluster, signature) VALUES (?, ?, ?)",
+            (key, cluster_id, signature.tobytes()),
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO bands (band, band_key, key) VALUES (?, ?, ?)",
+            ((band, band_key, key) for band, band_key in enumerate(band_keys)),
+        )
+        return cluster_id
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,147 @@
+"""
+Download handler tuned for crawls that hit a few hosts with many small
+requests, mostly through proxies.
+
+    DOWNLOAD_HANDLERS = {
+        "http": "job_watcher.downloader.TunedDownloadHandler",
+        "https": "job_watcher.downloader.TunedDownloadHandler",
+    }
+
+Persistent connections are pooled per host and per proxy with separate
+limits. Scrapy's default handler keeps at most CONCURRENT_REQUESTS_PER_DOMAIN
+idle connections per pool key, and every plain HTTP request going through a
+proxy shares the same key, so with more requests in flight than that the
+surplus connections are closed after each response and set up again for the
+next one. HTTPS requests through a proxy use CONNECT tunnels pooled per target
+host and proxy, which already fit the per-domain concurrency: for them the
+per-proxy limit only caps how many idle tunnels a proxy holds open. Direct
+HTTPS requests can optionally use HTTP/2 and share one multiplexed connection
+per host.
+"""
+
+import logging
+
+from scrapy.core.downloader.handlers.http11 import (
+    HTTP11DownloadHandler,
+    _LenientHTTP11ClientFactory,
+)
+from scrapy.http import Request, Response
+from scrapy.utils.httpobj import urlparse_cached
+from twisted.web.client import HTTPConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+class TunedConnectionPool(HTTPConnectionPool):
+    """
+    Connection pool keeping up to `max_per_host` idle connections for each
+    host and up to `max_per_proxy` for each proxy, plain HTTP requests and
+    CONNECT tunnels to any host together. Past a limit the connection idle
+    for the longest time is closed.
+    """
+
+    def __init__(
+        self, reactor, max_per_host: int, max_per_proxy: int, idle_timeout: float
+    ) -> None:
+        super().__init__(reactor, persistent=True)
+        self.maxPersistentPerHost = max_per_host
+        self.max_per_proxy = max_per_proxy
+        self.cachedConnectionTimeout = idle_timeout
+
+    @staticmethod
+    def proxy(key) -> tuple | None:
+        """
+        Proxy host and port of a Scrapy pool key, None for direct connections.
+        Keys are `(scheme, host, port, bind address)` for direct requests,
+        `(b"http-proxy", proxy host, proxy port, bind address)` for every
+        request sent to a plain HTTP proxy and `(scheme, host, port, proxy host,
+        proxy port, proxy auth, bind address)` for tunnels.
+        """
+        if key[0] == b"http-proxy":
+            return key[1:3]
+        if len(key) == 7:
+            return key[3:5]
+        return None
+
+    def limit(self, key) -> int:
+        if key[0] == b"http-proxy":
+            return self.max_per_proxy
+        return self.maxPersistentPerHost
+
+    def _putConnection(self, key, connection):
+        if connection.state != "QUIESCENT":
+            # Same guard as HTTPConnectionPool, let it log the bug
+            return super()._putConnection(key, connection)
+        connections = self._connections.setdefault(key, [])
+        while connections and len(connections) >= self.limit(key):
+            self._dropConnection(key, connections[0])
+        proxy = self.proxy(key)
+        if proxy is not None:
+            idle = [
+                (k, c)
+                for k, cs in self._connections.items()
+                if self.proxy(k) == proxy
+                for c in cs
+            ]
+            # Oldest first: the first to time out
+            idle.sort(key=lambda kc: self._timeouts[kc[1]].getTime())
+            for k, c in idle[: max(len(idle) + 1 - self.max_per_proxy, 0)]:
+                self._dropConnection(k, c)
+        connections.append(connection)
+        self._timeouts[connection] = self._reactor.callLater(
+            self.cachedConnectionTimeout, self._removeConnection, key, connection
+        )
+
+    def _dropConnection(self, key, connection) -> None:
+        self._connections[key].remove(connection)
+        connection.transport.loseConnection()
+        self._timeouts.pop(connection).cancel()
+
+
+class TunedDownloadHandler(HTTP11DownloadHandler):
+    """
+    HTTP/1.1 handler with a `TunedConnectionPool`, sending direct HTTPS
+    requests over HTTP/2 when DOWNLOAD_HTTP2_ENABLED is set.
+    """
+
+    def __init__(self, crawler):
+        super().__init__(crawler)
+        from twisted.internet import reactor
+
+        settings = crawler.settings
+        self._pool = TunedConnectionPool(
+            reactor,
+            max_per_host=settings.getint("DOWNLOAD_POOL_MAX_PER_HOST")
+            or settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN"),
+            max_per_proxy=settings.getint("DOWNLOAD_POOL_MAX_PER_PROXY")
+            or settings.getint("CONCURRENT_REQUESTS"),
+            idle_timeout=settings.getfloat("DOWNLOAD_POOL_IDLE_TIMEOUT", 240),
+        )
+        # Keep Scrapy's lenient response parsing
+        self._pool._factory = _LenientHTTP11ClientFactory
+        self.h2_handler = None
+        if settings.getbool("DOWNLOAD_HTTP2_ENABLED"):
+            try:
+                from scrapy.core.downloader.handlers.http2 import H2DownloadHandler
+            except ImportError:
+                logger.warning("HTTP/2 needs the h2 package, using HTTP/1.1")
+            else:
+                self.h2_handler = H2DownloadHandler(crawler)
+
+    def use_http2(self, request: Request) -> bool:
+        # Scrapy's HTTP/2 client does not support proxies
+        return (
+            self.h2_handler is not None
+            and urlparse_cached(request).scheme == "https"
+            and not request.meta.get("proxy")
+        )
+
+    async def download_request(self, request: Request) -> Response:
+        if self.use_http2(request):
+            return await self.h2_handler.download_request(request)
+        return await super().download_request(request)
+
+    async def close(self) -> None:
+        if self.h2_handler is not None:
+            await self.h2_handler.close()
+        await super().close()
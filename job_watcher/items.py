@@ -52,3 +52,9 @@ class JobPost(BaseModel):
     work_from_home_type: str | None = (
         None  # from clusters.wfhType (e.g., "Hybrid", "Remote")
     )
+
+    # Search queries that found this post, see LinkedinSpider.gen_query_tag
+    query_tags: list[str] | None = None
+
+    # Set by pipelines
+    duplicate_of: str | None = None  # id of the first post of its near-dup cluster
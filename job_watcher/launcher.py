@@ -0,0 +1,123 @@
+"""
+Run several LinkedIn searches on every core of the machine.
+
+Search specs are split across worker processes, each running its own
+CrawlerProcess. Workers share a SQLite seen-id store so a job is only
+scraped by one of them, and their outputs are merged into one dataset.
+
+    python -m job_watcher.launcher specs.json --workers 4 --output job_posts.csv
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from job_watcher.spiders.linkedin.model import LinkedinParams
+
+
+def shard_specs(specs: list[dict[str, Any]], workers: int) -> list[list[dict]]:
+    """
+    Split search specs round-robin across workers.
+    :param specs: List of LinkedinParams kwargs
+    :param workers: Number of worker processes
+    :return: One list of specs per worker, empty shards removed
+    """
+    shards = [specs[i::workers] for i in range(workers)]
+    return [shard for shard in shards if shard]
+
+
+def run_worker(specs: list[dict[str, Any]], output_dir: str, seen_ids_path: str):
+    # Imported here so the reactor is only installed inside the worker process
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    from job_watcher.spiders.linkedin.linkedin_spider import LinkedinSpider
+
+    settings = get_project_settings()
+    settings.set("SEEN_IDS_PATH", seen_ids_path)
+    process = CrawlerProcess(settings)
+    for i, spec in enumerate(specs):
+        # Each crawler copies the settings on creation, so outputs don't clash
+        output = Path(output_dir) / f"{os.getpid()}-{i}.csv"
+        process.settings.set("JOB_POSTS_OUTPUT", str(output))
+        crawler = process.create_crawler(LinkedinSpider)
+        process.crawl(crawler, **spec)
+    process.start()
+
+
+def merge_outputs(paths: list[Path], output: str) -> int:
+    """
+    Merge worker CSV outputs into one dataset, dropping duplicate job ids.
+    :param paths: Worker output files
+    :param output: Merged output file
+    :return: Number of rows written
+    """
+    import pandas as pd
+
+    frames = [pd.read_csv(path, index_col=0) for path in paths]
+    # Crawlers that scraped nothing write a header-less file
+    frames = [df for df in frames if "id" in df.columns]
+    if not frames:
+        pd.DataFrame().to_csv(output, index=True)
+        return 0
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop_duplicates(subset="id", keep="first").reset_index(drop=True)
+    df.to_csv(output, index=True)
+    return len(df)
+
+
+def run_sharded(
+    specs: list[dict[str, Any]],
+    workers: int | None = None,
+    output: str = "job_posts.csv",
+) -> int:
+    """
+    Crawl the given specs in parallel worker processes and merge the results.
+    :param specs: List of LinkedinParams kwargs
+    :param workers: Number of worker processes, defaults to the CPU count
+    :param output: Merged output file
+    :return: Number of rows written
+    """
+    # Fail fast on bad specs instead of inside a worker
+    for spec in specs:
+        LinkedinParams.model_validate(spec)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(specs)))
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="job_watcher-") as tmp:
+        seen_ids_path = str(Path(tmp) / "seen_ids.sqlite")
+        processes = [
+            ctx.Process(target=run_worker, args=(shard, tmp, seen_ids_path))
+            for shard in shard_specs(specs, workers)
+        ]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+
+        failed = [p.exitcode for p in processes if p.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"{len(failed)} worker(s) failed: {failed}")
+
+        return merge_outputs(sorted(Path(tmp).glob("*.csv")), output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("specs", help="JSON file with a list of search specs")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-o", "--output", default="job_posts.csv")
+    args = parser.parse_args()
+
+    with open(args.specs) as f:
+        specs = json.load(f)
+    total = run_sharded(specs, workers=args.workers, output=args.output)
+    print(f"Wrote {total} job posts to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@
 
 # useful for handling different item types with a single interface
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest
 
 
 class JobWatcherSpiderMiddleware:
@@ -96,3 +97,44 @@ class JobWatcherDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class CrawlBudgetMiddleware:
+    # Enforces the spider's `budget` (job_watcher.budget.CrawlBudget), if any.
+    # Requests still queued when the budget runs out are dropped here, so a
+    # crawl stops downloading as soon as it has what it needs.
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.stats = crawler.stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(crawler)
+        # Sent before HttpCompressionMiddleware decodes the body, so bytes are
+        # counted as transferred
+        crawler.signals.connect(
+            middleware.response_downloaded, signal=signals.response_downloaded
+        )
+        return middleware
+
+    def process_request(self, request):
+        budget = getattr(self.crawler.spider, "budget", None)
+        if budget is None:
+            return None
+
+        reason = budget.exhausted_reason
+        if reason is None and request.meta.get("budget") == "page":
+            # Search pages are surplus once enough items are committed
+            reason = "max_items" if budget.items_exhausted else None
+        if reason is not None:
+            self.stats.inc_value(f"budget/dropped/{reason}")
+            raise IgnoreRequest(f"Crawl budget exhausted: {reason}")
+
+        budget.record_request()
+        return None
+
+    def response_downloaded(self, response, request):
+        budget = getattr(self.crawler.spider, "budget", None)
+        if budget is not None:
+            budget.record_response(len(response.body))
@@ -56,6 +56,13 @@ class JobType(Enum):
     SUMMER = ("summer",)
     VOLUNTEER = ("volunteer",)
 
+    @classmethod
+    def _missing_(cls, value):
+        # JSON turns the tuple values into lists, e.g. when loading a dumped JobPost
+        if isinstance(value, list):
+            return cls(tuple(value))
+        return None
+
 
 class Country(Enum):
     """
@@ -142,6 +149,13 @@ class Country(Enum):
     # internal for linkedin
     WORLDWIDE = ("worldwide", "www")
 
+    @classmethod
+    def _missing_(cls, value):
+        # JSON turns the tuple values into lists, e.g. when loading a dumped JobPost
+        if isinstance(value, list):
+            return cls(tuple(value))
+        return None
+
     @property
     def indeed_domain_value(self):
         subdomain, _, api_country_code = self.value[1].partition(":")
@@ -0,0 +1,172 @@
+import json
+import re
+from collections import defaultdict
+from typing import Iterable
+
+from pydantic import BaseModel, field_validator
+
+from job_watcher.aggregates import YEARLY_FACTORS
+from job_watcher.items import JobPost
+from job_watcher.model import JobType
+
+WORD_REGEX = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return WORD_REGEX.findall(text.lower())
+
+
+class SavedAlert(BaseModel):
+    id: str
+    # Every keyword (or phrase) must appear in the title or description
+    keywords: list[str] = []
+    # Words that must all appear in the job location
+    location: str | None = None
+    job_types: list[JobType] | None = None
+    is_remote: bool | None = None
+    # Yearly, posts paid by the hour, day, week or month are converted
+    min_salary: float | None = None
+
+    @field_validator("job_types", mode="before")
+    @classmethod
+    def parse_job_types(cls, value):
+        # Accept enum names like "FULL_TIME" in alert files
+        if isinstance(value, list):
+            names = JobType.__members__
+            unknown = [v for v in value if isinstance(v, str) and v not in names]
+            if unknown:
+                raise ValueError(f"Unknown job types: {', '.join(unknown)}")
+            return [names[v] if isinstance(v, str) else v for v in value]
+        return value
+
+
+class Percolator:
+    """
+    Matches job posts against many saved alerts at once.
+
+    Each alert is indexed under a single anchor token: one of its keyword
+    tokens, else a location token, else its job types. A job post only
+    checks the alerts anchored on tokens it contains, so matching cost grows
+    with the size of the post and the number of candidate alerts rather than
+    the total number of alerts.
+    """
+
+    def __init__(self, alerts: Iterable[SavedAlert] = ()) -> None:
+        self.alerts: dict[str, SavedAlert] = {}
+        self.keyword_tokens: dict[str, list[tuple[str, ...]]] = {}
+        self.location_tokens: dict[str, set[str]] = {}
+        self.by_text_token: dict[str, set[str]] = defaultdict(set)
+        self.by_location_token: dict[str, set[str]] = defaultdict(set)
+        self.by_job_type: dict[JobType, set[str]] = defaultdict(set)
+        self.unanchored: set[str] = set()
+        self.anchors: dict[str, tuple[dict, str]] = {}
+        self.token_counts: dict[str, int] = defaultdict(int)
+        for alert in alerts:
+            self.add(alert)
+
+    @classmethod
+    def from_file(cls, path: str) -> "Percolator":
+        """
+        Load alerts from a JSON file holding a list of SavedAlert objects.
+        """
+        with open(path) as f:
+            return cls(SavedAlert.model_validate(alert) for alert in json.load(f))
+
+    def add(self, alert: SavedAlert) -> None:
+        if alert.id in self.alerts:
+            self.remove(alert.id)
+        self.alerts[alert.id] = alert
+
+        keywords = [tuple(tokenize(k)) for k in alert.keywords if tokenize(k)]
+        location = set(tokenize(alert.location)) if alert.location else set()
+        self.keyword_tokens[alert.id] = keywords
+        self.location_tokens[alert.id] = location
+
+        text_tokens = {token for keyword in keywords for token in keyword}
+        if text_tokens:
+            self._anchor(alert.id, self.by_text_token, text_tokens)
+        elif location:
+            self._anchor(alert.id, self.by_location_token, location)
+        elif alert.job_types:
+            for job_type in alert.job_types:
+                self.by_job_type[job_type].add(alert.id)
+        else:
+            self.unanchored.add(alert.id)
+
+    def _anchor(self, alert_id: str, index: dict, tokens: set[str]) -> None:
+        # Anchor on the least used token so the buckets stay small
+        anchor = min(tokens, key=lambda t: (self.token_counts[t], t))
+        self.token_counts[anchor] += 1
+        index[anchor].add(alert_id)
+        self.anchors[alert_id] = (index, anchor)
+
+    def remove(self, alert_id: str) -> None:
+        alert = self.alerts.pop(alert_id)
+        self.keyword_tokens.pop(alert_id)
+        self.location_tokens.pop(alert_id)
+        if alert_id in self.anchors:
+            index, anchor = self.anchors.pop(alert_id)
+            index[anchor].discard(alert_id)
+            self.token_counts[anchor] -= 1
+        for job_type in alert.job_types or ():
+            self.by_job_type[job_type].discard(alert_id)
+        self.unanchored.discard(alert_id)
+
+    def match(self, job_post: JobPost) -> list[str]:
+        """
+        Find the alerts a job post matches.
+        :param job_post: Job post to match
+        :return: Ids of the matching alerts
+        """
+        text = f"{job_post.title} {job_post.description or ''}"
+        text_words = tokenize(text)
+        text_tokens = set(text_words)
+        location = job_post.location.display_location() if job_post.location else ""
+        location_tokens = set(tokenize(location))
+        job_types = set(job_post.job_type or ())
+
+        candidates = set(self.unanchored)
+        for token in text_tokens:
+            candidates.update(self.by_text_token.get(token, ()))
+        for token in location_tokens:
+            candidates.update(self.by_location_token.get(token, ()))
+        for job_type in job_types:
+            candidates.update(self.by_job_type.get(job_type, ()))
+
+        # Phrases are checked on the token sequence with padding spaces
+        joined = f" {' '.join(text_words)} "
+        return sorted(
+            alert_id
+            for alert_id in candidates
+            if self._matches(
+                alert_id, job_post, text_tokens, joined, location_tokens, job_types
+            )
+        )
+
+    def _matches(
+        self, alert_id, job_post, text_tokens, joined, location_tokens, job_types
+    ) -> bool:
+        alert = self.alerts[alert_id]
+        for keyword in self.keyword_tokens[alert_id]:
+            if len(keyword) == 1:
+                if keyword[0] not in text_tokens:
+                    return False
+            elif f" {' '.join(keyword)} " not in joined:
+                return False
+        if not self.location_tokens[alert_id] <= location_tokens:
+            return False
+        if alert.job_types and not job_types.intersection(alert.job_types):
+            return False
+        if alert.is_remote is not None and bool(job_post.is_remote) != alert.is_remote:
+            return False
+        if alert.min_salary is not None:
+            compensation = job_post.compensation
+            top = compensation and (compensation.max_amount or compensation.min_amount)
+            if not top:
+                return False
+            if top * YEARLY_FACTORS.get(compensation.interval, 1) < alert.min_salary:
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self.alerts)
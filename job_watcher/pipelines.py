@@ -1,18 +1,348 @@
-import pandas as pd
+import json
+import os
 
-from job_watcher.model import JobPost
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from job_watcher.aggregates import AggregateStore, parse_rollups
+from job_watcher.coalescing import RequestCoalescer
+from job_watcher.company import CompanyCache
+from job_watcher.database import JobPostDatabase
+from job_watcher.items import JobPost
+from job_watcher.percolator import Percolator
+from job_watcher.search import SearchIndex
+
+# pandas, numpy (dedup) and zstandard (compression) are imported by the stages
+# that use them, so short runs don't pay for them at startup
+
+
+class CompanyEnrichmentPipeline:
+    """
+    Fills the company fields of job posts from their company page. Each page
+    is fetched at most once per COMPANY_CACHE_TTL, or COMPANY_CACHE_NEGATIVE_TTL
+    if it could not be read: results are kept in a persistent cache, and items
+    waiting for a page that is being fetched share that download.
+    """
+
+    def __init__(self, crawler, cache_path: str, ttl: float, negative_ttl: float):
+        self.crawler = crawler
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        cache_path = crawler.settings.get("COMPANY_CACHE_PATH")
+        if not cache_path:
+            raise NotConfigured("COMPANY_CACHE_PATH is not set")
+        return cls(
+            crawler,
+            cache_path=cache_path,
+            ttl=crawler.settings.getfloat("COMPANY_CACHE_TTL"),
+            negative_ttl=crawler.settings.getfloat("COMPANY_CACHE_NEGATIVE_TTL"),
+        )
+
+    def open_spider(self, spider):
+        self.cache = CompanyCache(self.cache_path, self.ttl, self.negative_ttl)
+        self.lookups = RequestCoalescer()
+        self.stats = self.crawler.stats
+
+    async def process_item(self, item: JobPost, spider):
+        parse_company_page = getattr(spider, "parse_company_page", None)
+        if parse_company_page is None or not item.company_url:
+            return item
+        profile = self.cache.get(item.company_url)
+        if profile is not None:
+            self.stats.inc_value("company/cache_hit")
+        else:
+            profile = await self.fetch_profile(item.company_url, parse_company_page)
+        if profile is not None:
+            profile.fill(item)
+        return item
+
+    async def fetch_profile(self, url: str, parse_company_page):
+        # Imported here, scrapy.http and twisted.web are slow to import
+        from scrapy import Request
+        from scrapy.exceptions import IgnoreRequest
+        from scrapy.utils.defer import maybe_deferred_to_future
+        from twisted.internet.defer import Deferred
+
+        waiter = Deferred()
+        if not self.lookups.join(url, waiter):
+            self.stats.inc_value("company/coalesced")
+            return await maybe_deferred_to_future(waiter)
+
+        profile = None
+        try:
+            response = await self.crawler.engine.download_async(Request(url))
+        except IgnoreRequest:
+            # Dropped before download (e.g. crawl budget), nothing learned
+            self.stats.inc_value("company/skipped")
+        except Exception as e:
+            self.cache.put(url, None)
+            self.stats.inc_value("company/failed")
+            self.crawler.spider.logger.debug(f"Failed to fetch company {url}: {e}")
+        else:
+            if response.status == 200:
+                profile = parse_company_page(response)
+            self.cache.put(url, profile)
+            if profile is not None:
+                self.stats.inc_value("company/fetched")
+            else:
+                self.stats.inc_value("company/unavailable")
+        for waiter in self.lookups.resolve(url):
+            waiter.callback(profile)
+        return profile
+
+    def close_spider(self, spider):
+        self.cache.close()
 
 
 class JobPostPipeline:
+    """
+    Writes the job posts to a CSV file when the crawl ends. Checkpointed
+    crawls (see job_watcher.checkpoint) also append every item to a JSON lines
+    spool next to the output, so a resumed crawl writes the items of the
+    interrupted run too. The spool is removed once the crawl is finished.
+    """
+
+    def __init__(self, crawler, output_path: str = "job_posts.csv"):
+        self.crawler = crawler
+        self.output_path = output_path
+        self.spool_path = f"{output_path}.partial.jsonl"
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(crawler, output_path=crawler.settings.get("JOB_POSTS_OUTPUT"))
+        crawler.signals.connect(pipeline.spider_closed, signal=signals.spider_closed)
+        return pipeline
+
     def open_spider(self, spider):
         self.items = []
+        self.spool = None
+        self.checkpoint = getattr(spider, "checkpoint", None)
+        if self.checkpoint is None:
+            return
+        if self.checkpoint.is_resumed and os.path.exists(self.spool_path):
+            with open(self.spool_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.items.append(JobPost.model_validate_json(line))
+                    except ValueError:
+                        # Torn write at the end of the spool
+                        break
+        mode = "a" if self.checkpoint.is_resumed else "w"
+        self.spool = open(self.spool_path, mode, encoding="utf-8")
 
     def process_item(self, item: JobPost, spider):
         # self.logger.info(item)
         self.items.append(item)
+        if self.spool is not None:
+            # Written before the checkpoint marks the item done
+            self.spool.write(item.model_dump_json() + "\n")
+            self.spool.flush()
         return item
 
     def close_spider(self, spider):
+        import pandas as pd
+
         spider.logger.info(f"Total items: {len(self.items)}")
         df = pd.DataFrame([item.dict() for item in self.items])
-        df.to_csv("job_posts.csv", index=True)
+        df.to_csv(self.output_path, index=True)
+        if self.spool is not None:
+            self.spool.close()
+
+    def spider_closed(self, spider, reason):
+        if self.checkpoint is not None and self.checkpoint.is_finished(reason):
+            os.remove(self.spool_path)
+
+
+class BatchPipeline:
+    """
+    Writes items to a store in batches of `batch_size`. Subclasses name the
+    settings holding the store location and batch size, and implement
+    `open_store` and `write`. Disabled when the location setting is not set.
+    """
+
+    path_setting: str
+    batch_size_setting: str
+
+    def __init__(self, crawler, path: str, batch_size: int = 500):
+        self.crawler = crawler
+        self.path = path
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get(cls.path_setting)
+        if not path:
+            raise NotConfigured(f"{cls.path_setting} is not set")
+        return cls(
+            crawler,
+            path=path,
+            batch_size=crawler.settings.getint(cls.batch_size_setting, 500),
+        )
+
+    def open_store(self):
+        raise NotImplementedError
+
+    def write(self, batch: list) -> None:
+        raise NotImplementedError
+
+    def to_batch(self, item: JobPost):
+        """
+        Turn an item into a batch entry.
+        :param item: Job post
+        :return: Entry passed to `write`, None to skip the item
+        """
+        return item
+
+    def open_spider(self, spider):
+        self.store = self.open_store()
+        self.batch = []
+
+    def process_item(self, item: JobPost, spider):
+        entry = self.to_batch(item)
+        if entry is not None:
+            self.batch.append(entry)
+            if len(self.batch) >= self.batch_size:
+                self.flush()
+        return item
+
+    def flush(self):
+        # A failed write drops its batch, so one outage doesn't fail every
+        # later item on its way to the next pipelines
+        batch, self.batch = self.batch, []
+        if not batch:
+            return
+        try:
+            self.write(batch)
+        except Exception:
+            name = type(self).__name__
+            self.crawler.stats.inc_value(f"{name}/failed_entries", len(batch))
+            self.crawler.spider.logger.exception(
+                f"{name} failed to write {len(batch)} entries"
+            )
+
+    def close_spider(self, spider):
+        self.flush()
+        self.store.close()
+
+
+class JobPostDatabasePipeline(BatchPipeline):
+    path_setting = "DATABASE_URL"
+    batch_size_setting = "DATABASE_BATCH_SIZE"
+
+    def open_store(self):
+        db = JobPostDatabase.from_url(self.path)
+        db.create_tables()
+        return db
+
+    def write(self, batch: list[JobPost]) -> None:
+        self.store.upsert(batch)
+
+
+class SearchIndexPipeline(BatchPipeline):
+    path_setting = "SEARCH_INDEX_PATH"
+    batch_size_setting = "SEARCH_INDEX_BATCH_SIZE"
+
+    def open_store(self):
+        return SearchIndex(self.path)
+
+    def write(self, batch: list[JobPost]) -> None:
+        self.store.add(batch)
+
+
+class NearDuplicatePipeline:
+    def __init__(self, index_path: str | None = None, threshold: float = 0.8):
+        self.index_path = index_path
+        self.threshold = threshold
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            index_path=crawler.settings.get("NEAR_DUPLICATE_INDEX_PATH"),
+            threshold=crawler.settings.getfloat("NEAR_DUPLICATE_THRESHOLD", 0.8),
+        )
+
+    def open_spider(self, spider):
+        # Built on the first item with a description, runs without any skip it
+        self.index = None
+
+    def get_index(self):
+        if self.index is None:
+            from job_watcher.dedup import NearDuplicateIndex
+
+            self.index = NearDuplicateIndex(
+                self.index_path or ":memory:", threshold=self.threshold
+            )
+        return self.index
+
+    def process_item(self, item: JobPost, spider):
+        if item.id and item.description:
+            item.duplicate_of = self.get_index().add(item.id, item.description)
+        return item
+
+    def close_spider(self, spider):
+        if self.index is not None:
+            self.index.close()
+
+
+class CompressedDescriptionPipeline(BatchPipeline):
+    path_setting = "DESCRIPTION_STORE_PATH"
+    batch_size_setting = "DESCRIPTION_STORE_BATCH_SIZE"
+
+    def open_store(self):
+        from job_watcher.compression import DescriptionStore
+
+        return DescriptionStore(self.path)
+
+    def to_batch(self, item: JobPost):
+        if item.id and item.description:
+            return item.id, item.description
+        return None
+
+    def write(self, batch: list[tuple[str, str]]) -> None:
+        self.store.put_many(batch)
+
+
+class AggregatesPipeline(BatchPipeline):
+    path_setting = "AGGREGATES_PATH"
+    batch_size_setting = "AGGREGATES_BATCH_SIZE"
+
+    def open_store(self):
+        rollups = parse_rollups(self.crawler.settings.get("AGGREGATE_ROLLUPS"))
+        return AggregateStore(self.path, rollups)
+
+    def write(self, batch: list[JobPost]) -> None:
+        self.store.add(batch)
+
+
+class PercolatorPipeline:
+    def __init__(self, alerts_path: str, matches_path: str):
+        self.alerts_path = alerts_path
+        self.matches_path = matches_path
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        alerts_path = crawler.settings.get("SAVED_ALERTS_PATH")
+        if not alerts_path:
+            raise NotConfigured("SAVED_ALERTS_PATH is not set")
+        return cls(
+            alerts_path=alerts_path,
+            matches_path=crawler.settings.get("ALERT_MATCHES_PATH"),
+        )
+
+    def open_spider(self, spider):
+        self.percolator = Percolator.from_file(self.alerts_path)
+        self.matches_file = open(self.matches_path, "a", encoding="utf-8")
+        spider.logger.info(f"Loaded {len(self.percolator)} saved alerts")
+
+    def process_item(self, item: JobPost, spider):
+        for alert_id in self.percolator.match(item):
+            match = {"alert_id": alert_id, "job_id": item.id}
+            self.matches_file.write(json.dumps(match) + "\n")
+        return item
+
+    def close_spider(self, spider):
+        self.matches_file.close()
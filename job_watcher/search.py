@@ -0,0 +1,253 @@
+"""
+Full-text search over collected job posts, backed by SQLite FTS5.
+
+    python -m job_watcher.search job_index.db "rust kubernetes" --location berlin
+"""
+
+import argparse
+import datetime as dt
+import re
+import sqlite3
+from typing import Iterable
+
+from pydantic import BaseModel
+
+from job_watcher.items import JobPost
+from job_watcher.model import Site
+from job_watcher.sqlite import connect_sqlite
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    rowid INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL UNIQUE,
+    site TEXT NOT NULL,
+    is_remote INTEGER,
+    date_posted TEXT,
+    job_url TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_date_posted ON documents (date_posted);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, company, description, location,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# bm25 weights for title, company, description and location
+RANK = "bm25(10.0, 5.0, 1.0, 3.0)"
+RESULT_COLUMNS = (
+    "job_id",
+    "title",
+    "company",
+    "location",
+    "site",
+    "date_posted",
+    "is_remote",
+    "job_url",
+    "score",
+)
+
+
+class SearchResult(BaseModel):
+    job_id: str
+    title: str
+    company: str
+    location: str
+    site: Site
+    date_posted: dt.date | None = None
+    is_remote: bool | None = None
+    job_url: str
+    score: float
+
+
+def quote_terms(query: str) -> str:
+    """
+    Turn a plain search into an FTS5 query matching all of its words, so that
+    searches like `c++` or `node.js` don't hit FTS5 syntax.
+    :param query: Words to search for
+    :return: FTS5 query, empty if the query has no searchable words
+    """
+    terms = [term for term in query.split() if re.search(r"\w", term)]
+    return " AND ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class SearchIndex:
+    """
+    An incremental full-text index over title, company, description and
+    location. Re-adding a job id replaces its document.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.conn = connect_sqlite(path)
+        self.conn.executescript(SCHEMA)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO documents_fts (documents_fts, rank) VALUES ('rank', ?)",
+                (RANK,),
+            )
+
+    def add(self, items: Iterable[JobPost]) -> None:
+        """
+        Index a batch of job posts in one transaction.
+        :param items: Job posts to index, items without id are skipped
+        """
+        with self.conn:
+            for item in items:
+                if item.id:
+                    self._add(item)
+
+    def _add(self, item: JobPost) -> None:
+        meta = (
+            item.site.value,
+            item.is_remote,
+            item.date_posted.isoformat() if item.date_posted else None,
+            item.job_url,
+        )
+        row = self.conn.execute(
+            "SELECT rowid FROM documents WHERE job_id = ?", (item.id,)
+        ).fetchone()
+        if row:
+            rowid = row[0]
+            self.conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (rowid,))
+            self.conn.execute(
+                "UPDATE documents SET site = ?, is_remote = ?, date_posted = ?, "
+                "job_url = ? WHERE rowid = ?",
+                (*meta, rowid),
+            )
+        else:
+            rowid = self.conn.execute(
+                "INSERT INTO documents (job_id, site, is_remote, date_posted, job_url)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (item.id, *meta),
+            ).lastrowid
+        self.conn.execute(
+            "INSERT INTO documents_fts (rowid, title, company, description, location)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (
+                rowid,
+                item.title,
+                item.company_name or "",
+                item.description or "",
+                item.location.display_location() if item.location else "",
+            ),
+        )
+
+    def search(
+        self,
+        query: str,
+        *,
+        location: str | None = None,
+        site: Site | None = None,
+        is_remote: bool | None = None,
+        posted_after: dt.date | None = None,
+        posted_before: dt.date | None = None,
+        limit: int = 20,
+        raw: bool = False,
+    ) -> list[SearchResult]:
+        """
+        Search the index, best matches first.
+        :param query: Words that must all match, e.g. `rust kubernetes`, or an
+            FTS5 query such as `title:engineer OR sre` if `raw` is set
+        :param location: Only match documents whose location contains these words
+        :param site: Only return posts from this site
+        :param is_remote: Only return remote (or non-remote) posts
+        :param posted_after: Only return posts posted on or after this date
+        :param posted_before: Only return posts posted on or before this date
+        :param limit: Maximum number of results
+        :param raw: Pass the query to FTS5 as is
+        :return: Ranked search results
+        :raise sqlite3.OperationalError: If a raw query is not valid FTS5
+        """
+        if not raw:
+            query = quote_terms(query)
+        match = f"({query})" if query.strip() else ""
+        if location:
+            quoted = location.replace('"', '""')
+            location_match = f'location : "{quoted}"'
+            match = f"{match} AND {location_match}" if match else location_match
+        if not match:
+            raise ValueError("Either query or location is required")
+
+        where = ["documents_fts MATCH ?"]
+        params: list = [match]
+        if site is not None:
+            where.append("d.site = ?")
+            params.append(site.value)
+        if is_remote is not None:
+            where.append("d.is_remote = ?")
+            params.append(is_remote)
+        if posted_after is not None:
+            where.append("d.date_posted >= ?")
+            params.append(posted_after.isoformat())
+        if posted_before is not None:
+            where.append("d.date_posted <= ?")
+            params.append(posted_before.isoformat())
+        params.append(limit)
+
+        rows = self.conn.execute(
+            f"SELECT d.job_id, f.title, f.company, f.location, d.site, "
+            f"d.date_posted, d.is_remote, d.job_url, f.rank "
+            f"FROM documents_fts AS f JOIN documents AS d ON d.rowid = f.rowid "
+            f"WHERE {' AND '.join(where)} ORDER BY f.rank LIMIT ?",
+            params,
+        ).fetchall()
+        return [SearchResult(**dict(zip(RESULT_COLUMNS, row))) for row in rows]
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def optimize(self) -> None:
+        """Merge the index segments, worth running after large ingests."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO documents_fts(documents_fts) VALUES('optimize')"
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("index", help="Path to the search index database")
+    parser.add_argument("query", help="Words to search for, e.g. 'rust kubernetes'")
+    parser.add_argument(
+        "--raw",
+        action="store_true",
+        help="Treat the query as FTS5 syntax, e.g. 'title:engineer OR sre'",
+    )
+    parser.add_argument("--location", default=None)
+    parser.add_argument("--site", type=Site, default=None)
+    remote = parser.add_mutually_exclusive_group()
+    remote.add_argument("--remote", dest="is_remote", action="store_true")
+    remote.add_argument("--onsite", dest="is_remote", action="store_false")
+    parser.set_defaults(is_remote=None)
+    parser.add_argument("--since", type=dt.date.fromisoformat, default=None)
+    parser.add_argument("--until", type=dt.date.fromisoformat, default=None)
+    parser.add_argument("-n", "--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    try:
+        results = index.search(
+            args.query,
+            location=args.location,
+            site=args.site,
+            is_remote=args.is_remote,
+            posted_after=args.since,
+            posted_before=args.until,
+            limit=args.limit,
+            raw=args.raw,
+        )
+    except (ValueError, sqlite3.OperationalError) as e:
+        index.close()
+        parser.error(f"invalid query: {e}")
+    for result in results:
+        print(
+            f"{result.score:8.2f}  {result.job_id}  {result.title} @ "
+            f"{result.company} ({result.location})  {result.job_url}"
+        )
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from job_watcher.sqlite import DEFAULT_TIMEOUT, connect_sqlite
+
+
+class SeenIdStore:
+    """
+    A seen-id set backed by SQLite so several crawler processes on the same
+    machine can share it. `claim` is atomic: exactly one caller wins an id.
+    """
+
+    def __init__(self, path: str, timeout: float = DEFAULT_TIMEOUT) -> None:
+        self.path = path
+        self.conn = connect_sqlite(path, timeout, autocommit=True)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen_ids (id TEXT PRIMARY KEY)")
+
+    def claim(self, job_id: str) -> bool:
+        """
+        Mark a job id as seen.
+        :param job_id: Job id
+        :return: True if the id was not seen before by any process
+        """
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO seen_ids (id) VALUES (?)", (job_id,)
+        )
+        return cursor.rowcount == 1
+
+    def __contains__(self, job_id: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM seen_ids WHERE id = ?", (job_id,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM seen_ids").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
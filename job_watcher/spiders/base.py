@@ -0,0 +1,41 @@
+from scrapy import Spider
+
+from job_watcher.budget import CrawlBudget
+from job_watcher.seen import SeenIdStore
+
+
+class JobSpider(Spider):
+    """
+    Base of the job board spiders, used with `Args` of a params model having
+    `results_wanted`. Holds the crawl budget and the ids of the jobs already
+    seen, by this crawl or, with SEEN_IDS_PATH, by any crawler process.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen_ids = set()
+        self.seen_store = None
+        self.budget = CrawlBudget(max_items=self.args.results_wanted)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        spider.budget = CrawlBudget(
+            max_items=spider.args.results_wanted,
+            max_requests=settings.getint("CRAWL_BUDGET_MAX_REQUESTS") or None,
+            max_bytes=settings.getint("CRAWL_BUDGET_MAX_BYTES") or None,
+            max_seconds=settings.getfloat("CRAWL_BUDGET_MAX_SECONDS") or None,
+        )
+        seen_ids_path = settings.get("SEEN_IDS_PATH")
+        if seen_ids_path:
+            # shared with other crawler processes, see job_watcher.launcher
+            spider.seen_store = SeenIdStore(seen_ids_path)
+        return spider
+
+    def is_new_job(self, job_id: str) -> bool:
+        if job_id in self.seen_ids:
+            return False
+        if self.seen_store is not None and not self.seen_store.claim(job_id):
+            return False
+        return True
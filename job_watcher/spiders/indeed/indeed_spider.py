@@ -0,0 +1,350 @@
+import datetime as dt
+import json
+
+from scrapy.http.response import Response
+from scrapy_spider_metadata import Args
+
+from job_watcher.custom import WrappedRequest
+from job_watcher.items import JobPost
+from job_watcher.model import Compensation, CompensationInterval, Location, Site
+from job_watcher.spiders.base import JobSpider
+from job_watcher.spiders.indeed.model import IndeedParams
+from job_watcher.spiders.utils import (
+    extract_emails_from_text,
+    get_enum_from_job_type,
+    markdown_converter,
+)
+
+JOB_SEARCH_QUERY = """
+query GetJobData {{
+  jobSearch(
+    {what}
+    {location}
+    limit: {limit}
+    {cursor}
+    sort: RELEVANCE
+    {filters}
+  ) {{
+    pageInfo {{
+      nextCursor
+    }}
+    results {{
+      trackingKey
+      job {{
+        key
+        title
+        datePublished
+        description {{
+          html
+        }}
+        location {{
+          countryCode
+          admin1Code
+          city
+          formatted {{
+            long
+          }}
+        }}
+        compensation {{
+          baseSalary {{
+            unitOfWork
+            range {{
+              ... on Range {{
+                min
+                max
+              }}
+            }}
+          }}
+          estimated {{
+            currencyCode
+            baseSalary {{
+              unitOfWork
+              range {{
+                ... on Range {{
+                  min
+                  max
+                }}
+              }}
+            }}
+          }}
+          currencyCode
+        }}
+        attributes {{
+          key
+          label
+        }}
+        employer {{
+          relativeCompanyPageUrl
+          name
+          dossier {{
+            employerDetails {{
+              addresses
+              industry
+              employeesLocalizedLabel
+              revenueLocalizedLabel
+              briefDescription
+            }}
+            images {{
+              headerImageUrl
+              squareLogoUrl
+            }}
+            links {{
+              corporateWebsite
+            }}
+          }}
+        }}
+        recruit {{
+          viewJobUrl
+        }}
+      }}
+    }}
+  }}
+}}
+"""
+
+
+class IndeedSpider(Args[IndeedParams], JobSpider):
+    """
+    Searches Indeed through the GraphQL API of its mobile app. A single
+    response holds up to `page_size` jobs with their full description and
+    employer details, no per-job detail request is needed.
+    """
+
+    name = "indeed_spider"
+    api_url = "https://apis.indeed.com/graphql"
+    page_size = 100
+    api_headers = {
+        "Host": "apis.indeed.com",
+        "Content-Type": "application/json",
+        # Public key of the Indeed iOS app
+        "indeed-api-key": (
+            "161092c2017b5bbab13edb12461a62d5a833871e7cad6d9d475304573de67ac8"
+        ),
+        "accept": "application/json",
+        "indeed-locale": "en-US",
+        "accept-language": "en-US,en;q=0.9",
+        "user-agent": (
+            "Mozilla/5.0 (iPhone; CPU iPhone OS 16_6_1 like Mac OS X) "
+            "AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148 Indeed App 193.1"
+        ),
+        "indeed-app-info": (
+            "appv=193.1; appid=com.indeed.jobsearch; osv=16.6.1; os=ios; dtype=phone"
+        ),
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        domain, self.api_country_code = self.args.country.indeed_domain_value
+        self.base_url = f"https://{domain}.indeed.com"
+        self.query_tag = self.gen_query_tag()
+        self.skipped = 0
+
+    def gen_query_tag(self) -> str:
+        """
+        Identify the search by its arguments, see LinkedinSpider.gen_query_tag.
+        """
+        params = self.args.model_dump(
+            include={
+                "search_term",
+                "location",
+                "distance",
+                "is_remote",
+                "job_type",
+                "easy_apply",
+                "hours_old",
+            },
+            exclude_none=True,
+            mode="json",
+        )
+        return f"indeed:{self.api_country_code}:" + json.dumps(params, sort_keys=True)
+
+    def gen_filters(self) -> str:
+        # The API takes a single filter, like the Indeed app
+        if self.args.hours_old:
+            return (
+                'filters: { date: { field: "dateOnIndeed", '
+                f'start: "{self.args.hours_old}h" }} }}'
+            )
+        if self.args.easy_apply:
+            return (
+                'filters: { keyword: { field: "indeedApplyScope", keys: ["DESKTOP"] } }'
+            )
+        keys = [k for k in (self.args.job_type_key, self.args.remote_key) if k]
+        if keys:
+            return (
+                "filters: { composite: { filters: [{ keyword: "
+                f'{{ field: "attributes", keys: {json.dumps(keys)} }} }}] }} }}'
+            )
+        return ""
+
+    def gen_query(self, cursor: str | None) -> str:
+        what = f"what: {json.dumps(self.args.search_term)}"
+        location = (
+            f"location: {{where: {json.dumps(self.args.location)}, "
+            f"radius: {self.args.distance or 50}, radiusUnit: MILES}}"
+            if self.args.location
+            else ""
+        )
+        return JOB_SEARCH_QUERY.format(
+            what=what if self.args.search_term else "",
+            location=location,
+            limit=self.page_size,
+            cursor=f"cursor: {json.dumps(cursor)}" if cursor else "",
+            filters=self.gen_filters(),
+        )
+
+    async def start(self):
+        yield self.search_request(None)
+
+    def search_request(self, cursor: str | None):
+        return WrappedRequest(
+            url=self.api_url,
+            method="POST",
+            headers={**self.api_headers, "indeed-co": self.api_country_code},
+            body={"query": self.gen_query(cursor)},
+            callback=self.parse_job_posts,
+            meta={"budget": "page"},
+        )
+
+    def parse_job_posts(self, response: Response):
+        data = response.json()
+        if data.get("errors"):
+            self.logger.error(f"Indeed API error: {data['errors']}")
+            return
+        job_search = data["data"]["jobSearch"]
+        results = job_search["results"]
+        # A hard budget limit only stops new requests, the jobs of this page
+        # are already downloaded
+        for result in results:
+            if self.budget.items_exhausted:
+                break
+            job = result["job"]
+            # Keyed like JobPost.id, the seen store may be shared with LinkedIn
+            job_id = f"in-{job['key']}"
+            if job_id in self.seen_ids:
+                continue
+            # Skipped jobs are not claimed, other crawlers may still scrape them
+            if self.skipped < self.args.offset:
+                self.seen_ids.add(job_id)
+                self.skipped += 1
+                continue
+            if not self.is_new_job(job_id):
+                continue
+            self.seen_ids.add(job_id)
+            self.budget.commit(self.query_tag)
+            job_post = self.parse_job(job)
+            job_post.query_tags = [self.query_tag]
+            yield job_post
+
+        if self.budget.items_exhausted:
+            self.logger.info("Reached max results, stopping.")
+            return
+        if self.budget.exhausted:
+            self.logger.info(f"Crawl budget exhausted: {self.budget.exhausted_reason}")
+            return
+        cursor = job_search["pageInfo"]["nextCursor"]
+        if results and cursor:
+            yield self.search_request(cursor)
+
+    def parse_job(self, job: dict) -> JobPost:
+        """
+        Build a JobPost from a job of a search response.
+        :param job: `job` object of a jobSearch result
+        :return: Job post
+        """
+        description = markdown_converter(job["description"]["html"])
+        employer = job.get("employer") or {}
+        dossier = employer.get("dossier") or {}
+        employer_details = dossier.get("employerDetails") or {}
+        images = dossier.get("images") or {}
+        links = dossier.get("links") or {}
+
+        job_type = []
+        for attribute in job.get("attributes") or ():
+            label = attribute["label"].replace("-", "").replace(" ", "").lower()
+            job_type_enum = get_enum_from_job_type(label)
+            if job_type_enum:
+                job_type.append(job_type_enum)
+
+        location_data = job.get("location") or {}
+        location = Location(
+            city=location_data.get("city"),
+            state=location_data.get("admin1Code"),
+            country=location_data.get("countryCode"),
+        )
+
+        date_posted = None
+        if job.get("datePublished"):
+            date_posted = dt.datetime.fromtimestamp(
+                job["datePublished"] / 1000, tz=dt.timezone.utc
+            ).date()
+
+        remote_text = " ".join(
+            [
+                description or "",
+                (location_data.get("formatted") or {}).get("long") or "",
+                *(attribute["label"] for attribute in job.get("attributes") or ()),
+            ]
+        ).lower()
+        is_remote = any(
+            keyword in remote_text for keyword in ("remote", "work from home", "wfh")
+        )
+
+        company_url = None
+        if employer.get("relativeCompanyPageUrl"):
+            company_url = f"{self.base_url}{employer['relativeCompanyPageUrl']}"
+        addresses = employer_details.get("addresses")
+
+        return JobPost(
+            id=f"in-{job['key']}",
+            title=job["title"],
+            site=Site.INDEED,
+            job_url=f"{self.base_url}/viewjob?jk={job['key']}",
+            job_url_direct=(job.get("recruit") or {}).get("viewJobUrl"),
+            company_name=employer.get("name"),
+            company_url=company_url,
+            company_url_direct=links.get("corporateWebsite"),
+            location=location,
+            description=description,
+            job_type=job_type,
+            compensation=self.parse_compensation(job.get("compensation")),
+            date_posted=date_posted,
+            emails=extract_emails_from_text(description),
+            is_remote=is_remote,
+            company_addresses=addresses[0] if addresses else None,
+            company_industry=(
+                employer_details["industry"]
+                .replace("Iv1", "")
+                .replace("_", " ")
+                .title()
+                .strip()
+                if employer_details.get("industry")
+                else None
+            ),
+            company_num_employees=employer_details.get("employeesLocalizedLabel"),
+            company_revenue=employer_details.get("revenueLocalizedLabel"),
+            company_description=employer_details.get("briefDescription"),
+            company_logo=images.get("squareLogoUrl"),
+            banner_photo_url=images.get("headerImageUrl"),
+        )
+
+    @staticmethod
+    def parse_compensation(compensation: dict | None) -> Compensation | None:
+        if not compensation:
+            return None
+        estimated = compensation.get("estimated") or {}
+        base_salary = compensation.get("baseSalary") or estimated.get("baseSalary")
+        if not base_salary:
+            return None
+        salary_range = base_salary.get("range") or {}
+        interval = CompensationInterval.get_interval(base_salary.get("unitOfWork"))
+        if not interval or not salary_range:
+            return None
+        return Compensation(
+            interval=interval,
+            min_amount=salary_range.get("min"),
+            max_amount=salary_range.get("max"),
+            currency=estimated.get("currencyCode")
+            or compensation.get("currencyCode")
+            or "USD",
+        )
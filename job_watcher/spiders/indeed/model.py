@@ -0,0 +1,39 @@
+from pydantic import BaseModel, computed_field
+
+from job_watcher.model import Country
+from job_watcher.spiders.model import JobType
+
+
+class IndeedParams(BaseModel):
+    search_term: str | None = None
+    location: str | None = None
+    distance: int | None = 50
+    is_remote: bool = False
+    job_type: JobType | None = None
+    easy_apply: bool | None = None
+    offset: int = 0
+    # Country name, see job_watcher.model.Country
+    country_indeed: str = "usa"
+
+    results_wanted: int = 15
+    hours_old: int | None = None
+
+    @computed_field
+    @property
+    def country(self) -> Country:
+        return Country.from_string(self.country_indeed)
+
+    @computed_field
+    @property
+    def job_type_key(self) -> str | None:
+        return {
+            JobType.FULL_TIME: "CF3CP",
+            JobType.PART_TIME: "75GKK",
+            JobType.CONTRACT: "NJXCK",
+            JobType.INTERNSHIP: "VDTG7",
+        }.get(self.job_type, None)
+
+    @computed_field
+    @property
+    def remote_key(self) -> str | None:
+        return "DSQF7" if self.is_remote else None
@@ -1,14 +1,19 @@
 import datetime as dt
 import re
-from urllib.parse import unquote, urlparse, urlunparse
+from urllib.parse import parse_qs, unquote, urlencode, urlparse, urlunparse
 
-from scrapy import Spider
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest
 from scrapy.http.response import Response
 from scrapy_spider_metadata import Args
 
+from job_watcher.checkpoint import CrawlCheckpoint
+from job_watcher.coalescing import RequestCoalescer
+from job_watcher.company import CompanyProfile
 from job_watcher.custom import WrappedRequest
 from job_watcher.items import JobPost
 from job_watcher.model import Compensation, Country, Location, Site
+from job_watcher.spiders.base import JobSpider
 from job_watcher.spiders.linkedin.model import LinkedinParams
 from job_watcher.spiders.utils import (
     currency_parser,
@@ -19,19 +24,63 @@ from job_watcher.spiders.utils import (
 )
 
 
-class LinkedinSpider(Args[LinkedinParams], Spider):
+class LinkedinSpider(Args[LinkedinParams], JobSpider):
     name = "linkedin_spider"
     base_url = "https://www.linkedin.com"
     init_search_endpoint = "/jobs-guest/jobs/search"
     more_search_endpoint = "/jobs-guest/jobs/api/seeMoreJobPostings/search"
     job_detail_endpoint = "/jobs/view"
+    # Filters used to split a saturated query, in order. f_TPR only takes a
+    # "posted in the last N seconds" value, so it cannot split into disjoint
+    # time windows, and company ids (f_C) are not known up front.
+    slice_filters = {
+        # full-time, part-time, contract, temporary, internship, volunteer, other
+        "f_JT": ("F", "P", "C", "T", "I", "V", "O"),
+        # on-site, remote, hybrid
+        "f_WT": ("1", "2", "3"),
+        # internship, entry, associate, mid-senior, director, executive
+        "f_E": ("1", "2", "3", "4", "5", "6"),
+    }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.base_req_params = self.gen_base_request_params()
-        self.seen_ids = set()
-        self.start_param = self.args.starting_point
+        # job id -> query tags waiting for the in-flight detail request
+        self.detail_requests = RequestCoalescer()
+        self.query_tag = self.gen_query_tag(self.base_req_params)
         self.job_url_direct_regex = re.compile(r'(?<=\?url=)[^"]+')
+        self.checkpoint = None
+        self.pagination_cap = 1000
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.pagination_cap = crawler.settings.getint("LINKEDIN_PAGINATION_CAP")
+        checkpoint_path = crawler.settings.get("CRAWL_CHECKPOINT_PATH")
+        if checkpoint_path:
+            spider.checkpoint = CrawlCheckpoint(
+                checkpoint_path,
+                flush_interval=crawler.settings.getfloat(
+                    "CRAWL_CHECKPOINT_INTERVAL", 5.0
+                ),
+                resume=crawler.settings.getbool("CRAWL_CHECKPOINT_RESUME"),
+            )
+            spider.checkpoint.start(
+                spider.args.model_dump(
+                    mode="json", include=set(LinkedinParams.model_fields)
+                )
+            )
+            for signal in (signals.item_scraped, signals.item_dropped):
+                crawler.signals.connect(spider.on_item_done, signal=signal)
+            crawler.signals.connect(spider.on_closed, signal=signals.spider_closed)
+        return spider
+
+    def on_item_done(self, item, **kwargs):
+        if isinstance(item, JobPost) and item.id:
+            self.checkpoint.done(item.id)
+
+    def on_closed(self, spider, reason):
+        self.checkpoint.close(reason)
 
     def gen_base_request_params(self):
         params = {
@@ -52,25 +101,117 @@ class LinkedinSpider(Args[LinkedinParams], Spider):
         params = {k: v for k, v in params.items() if v is not None}
         return params
 
+    @staticmethod
+    def gen_query_tag(params: dict) -> str:
+        """
+        Identify a search query by its filters, ignoring pagination.
+        """
+        return urlencode({k: v for k, v in params.items() if k != "pageNum"})
+
+    def split_query(self, params: dict) -> list[dict]:
+        """
+        Narrow a query on the first slice filter it does not set yet.
+        :param params: Search parameters of the saturated query
+        :return: Parameters of the sub-queries, empty if it cannot be split
+        """
+        for key, values in self.slice_filters.items():
+            if key not in params:
+                return [{**params, key: value} for value in values]
+        return []
+
     async def start(self):
-        params = {**self.base_req_params, "start": self.start_param}
-        yield WrappedRequest(
-            url=f"{self.base_url}{self.init_search_endpoint}",
+        if self.checkpoint is not None and self.checkpoint.is_resumed:
+            for request_or_item in self.resume():
+                yield request_or_item
+            return
+
+        yield self.search_request(
+            self.query_tag, self.base_req_params, self.args.starting_point
+        )
+
+    def resume(self):
+        """
+        Pick up a checkpointed crawl: fetch the details that were outstanding
+        and continue every query from its cursor. Items emitted before are
+        not emitted again, JobPostPipeline keeps them in its output.
+        """
+        state = self.checkpoint.state
+        self.logger.info(
+            f"Resuming crawl: {len(state.emitted)} emitted, "
+            f"{len(state.pending)} outstanding, {len(state.cursors)} queries"
+        )
+        self.seen_ids.update(state.seen_job_ids)
+        self.budget.commit("", len(state.emitted))
+        for job in state.pending.values():
+            self.budget.commit(job.query_tags[0] if job.query_tags else "")
+
+        for job in list(state.pending.values()):
+            if not self.args.linkedin_fetch_description:
+                job_post = JobPost.model_validate(job.job_post)
+                job_post.query_tags = job.query_tags
+                yield job_post
+                continue
+            for query_tag in job.query_tags:
+                self.detail_requests.join(job.job_id, query_tag)
+            yield self.detail_request(job.job_id, job.job_post)
+
+        for query_tag, cursor in list(state.cursors.items()):
+            yield self.search_request(query_tag, cursor.params, cursor.start)
+
+    def search_request(self, query_tag: str, params: dict, start: int):
+        if self.checkpoint is not None:
+            self.checkpoint.cursor(query_tag, params, start)
+        endpoint = (
+            self.init_search_endpoint
+            if start in (0, self.args.starting_point)
+            else self.more_search_endpoint
+        )
+        return WrappedRequest(
+            url=f"{self.base_url}{endpoint}",
             method="GET",
-            params=params,
+            params={**params, "start": start},
             callback=self.parse_job_posts,
+            cb_kwargs={"query_tag": query_tag, "params": params, "start": start},
+            meta={"budget": "page"},
         )
 
-    def parse_job_posts(self, response: Response):
+    def detail_request(self, job_id: str, job_post: dict):
+        # job_post is passed as plain JSON data so requests can be serialized
+        return WrappedRequest(
+            url=f"{self.base_url}{self.job_detail_endpoint}/{job_id}",
+            method="GET",
+            callback=self.parse_job_detail,
+            errback=self.parse_job_detail_error,
+            cb_kwargs={"job_post": job_post, "job_id": job_id},
+        )
+
+    def end_query(self, query_tag: str):
+        if self.checkpoint is not None:
+            self.checkpoint.query_done(query_tag)
+
+    def parse_job_posts(
+        self, response: Response, query_tag: str, params: dict, start: int
+    ):
         job_cards = response.css("div.base-search-card")
         if not job_cards:
+            self.end_query(query_tag)
             return
 
+        # A hard budget limit only stops new requests, the cards of this page
+        # are already downloaded
         for job_card in job_cards:
+            if self.budget.items_exhausted:
+                break
             href = job_card.css("a.base-card__full-link::attr(href)").get()
             job_id = href.split("?")[0].rsplit("-", 1)[-1]
-            if job_id in self.seen_ids:
+            if job_id in self.detail_requests:
+                # Already being fetched for another page or query, share it
+                self.detail_requests.join(job_id, query_tag)
                 continue
+            if not self.is_new_job(job_id):
+                continue
+            self.budget.commit(query_tag)
+            self.seen_ids.add(job_id)
 
             self.logger.info(f"Found job: {job_id}")
 
@@ -150,31 +291,78 @@ class LinkedinSpider(Args[LinkedinParams], Spider):
                 job_url=detail_job_url,
                 compensation=compensation,
             )
-            if not self.args.linkedin_fetch_description:
-                yield job_post
-                continue
-
-            yield WrappedRequest(
-                url=detail_job_url,
-                method="GET",
-                callback=self.parse_job_detail,
-                cb_kwargs={"job_post": job_post},
-            )
-            self.seen_ids.add(job_id)
+            job_post_data = job_post.model_dump(mode="json")
+            if self.checkpoint is not None:
+                self.checkpoint.pending(job_id, job_post_data, [query_tag])
+            if self.args.linkedin_fetch_description:
+                if not self.budget.exhausted:
+                    self.detail_requests.join(job_id, query_tag)
+                    yield self.detail_request(job_id, job_post_data)
+                    continue
+                if self.checkpoint is not None:
+                    # Left outstanding, a resumed crawl fetches its details
+                    continue
+                # The detail request would be dropped, emit the card as is
+            job_post.query_tags = [query_tag]
+            yield job_post
 
-        if len(self.seen_ids) >= self.args.results_wanted:
+        if self.budget.items_exhausted:
             self.logger.info("Reached max results, stopping.")
+            self.end_query(query_tag)
+            return
+        if self.budget.exhausted:
+            # Not the end of the query, a resumed crawl can continue it
+            self.logger.info(f"Crawl budget exhausted: {self.budget.exhausted_reason}")
             return
 
-        self.start_param += 25
-        yield WrappedRequest(
-            url=f"{self.base_url}{self.more_search_endpoint}",
-            method="GET",
-            params={**self.base_req_params, "start": self.start_param},
-            callback=self.parse_job_posts,
+        next_start = start + 25
+        if self.pagination_cap and next_start >= self.pagination_cap:
+            yield from self.slice_query(query_tag, params)
+            return
+        yield self.search_request(query_tag, params, next_start)
+
+    def slice_query(self, query_tag: str, params: dict):
+        """
+        Replace a query that hit the pagination cap with narrower sub-queries.
+        They run concurrently, jobs they share with the parent query or with
+        each other are skipped by `is_new_job` or joined to the detail
+        request already in flight.
+        """
+        self.end_query(query_tag)
+        sub_queries = self.split_query(params)
+        if not sub_queries:
+            self.logger.warning(
+                f"Query reached the pagination cap and cannot be split further: "
+                f"{query_tag}"
+            )
+            self.crawler.stats.inc_value("linkedin/queries_truncated")
+            return
+        self.logger.info(
+            f"Query reached the pagination cap, splitting into "
+            f"{len(sub_queries)} sub-queries: {query_tag}"
+        )
+        self.crawler.stats.inc_value("linkedin/queries_split")
+        for sub_params in sub_queries:
+            yield self.search_request(self.gen_query_tag(sub_params), sub_params, 0)
+
+    def parse_job_detail_error(self, failure):
+        # Still emit what the search card had, once, for every waiting query
+        job_post = JobPost.model_validate(failure.request.cb_kwargs["job_post"])
+        job_post.query_tags = self.detail_requests.resolve(
+            failure.request.cb_kwargs["job_id"]
         )
+        if failure.check(IgnoreRequest):
+            self.logger.debug(f"Dropped job detail {job_post.id}: {failure.value}")
+            if self.checkpoint is not None and self.budget.exhausted:
+                # Left outstanding, a resumed crawl fetches its details
+                return
+        else:
+            self.logger.warning(f"Failed to fetch job detail {job_post.id}: {failure}")
+        yield job_post
 
-    def parse_job_detail(self, response: Response, job_post: JobPost):
+    def parse_job_detail(self, response: Response, job_post: dict, job_id: str):
+        job_post = JobPost.model_validate(job_post)
+        job_post.query_tags = self.detail_requests.resolve(job_id)
         if "linkedin.com/signup" in response.url:
             yield job_post
             return
@@ -258,3 +446,40 @@ class LinkedinSpider(Args[LinkedinParams], Spider):
         job_post.emails = emails
         job_post.is_remote = is_remote
         yield job_post
+
+    def parse_company_page(self, response: Response) -> CompanyProfile | None:
+        """
+        Read the "About us" section of a company page, used by
+        CompanyEnrichmentPipeline.
+        :return: The profile, None if LinkedIn asked to sign in instead
+        """
+        if "linkedin.com/signup" in response.url or "/authwall" in response.url:
+            return None
+
+        def about_us(name: str) -> str | None:
+            return get_full_text(
+                response.css(f'[data-test-id="about-us__{name}"] dd'),
+                seperator=" ",
+                default=None,
+            )
+
+        # The website link goes through a LinkedIn redirect, its text is the URL
+        website = about_us("website")
+        if website is None:
+            href = response.css(
+                '[data-test-id="about-us__website"] a::attr(href)'
+            ).get()
+            if href:
+                website = parse_qs(urlparse(href).query).get("url", [None])[0]
+
+        return CompanyProfile(
+            industry=about_us("industry"),
+            num_employees=about_us("size"),
+            description=get_full_text(
+                response.css('[data-test-id="about-us__description"]'),
+                seperator=" ",
+                default=None,
+            ),
+            addresses=about_us("headquarters"),
+            url_direct=website,
+        )
@@ -1,14 +1,6 @@
-from enum import Enum
-
 from pydantic import BaseModel, computed_field
 
-
-class JobType(Enum):
-    FULL_TIME = "FULL_TIME"
-    PART_TIME = "PART_TIME"
-    INTERNSHIP = "INTERNSHIP"
-    CONTRACT = "CONTRACT"
-    TEMPORARY = "TEMPORARY"
+from job_watcher.spiders.model import JobType
 
 
 class LinkedinParams(BaseModel):
@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class JobType(Enum):
+    """
+    Job type filter of a search, each spider maps it to its site's own codes.
+    """
+
+    FULL_TIME = "FULL_TIME"
+    PART_TIME = "PART_TIME"
+    INTERNSHIP = "INTERNSHIP"
+    CONTRACT = "CONTRACT"
+    TEMPORARY = "TEMPORARY"
@@ -1,7 +1,5 @@
 import re
 
-import numpy as np
-from markdownify import markdownify as md
 from scrapy.selector import SelectorList
 
 from job_watcher.model import JobType
@@ -21,7 +19,7 @@ def currency_parser(cur_str):
     else:
         num = float(cur_str)
 
-    return np.round(num, 2)
+    return round(num, 2)
 
 
 def get_full_text(
@@ -49,6 +47,9 @@ def markdown_converter(html_component: SelectorList) -> str:
     """
     if not html_component:
         return ""
+    # markdownify pulls in bs4, only pay for it when descriptions are fetched
+    from markdownify import markdownify as md
+
     return md(html_component)
 
 
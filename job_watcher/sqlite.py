@@ -0,0 +1,25 @@
+import sqlite3
+
+# How long a connection waits for another process's write lock, in seconds
+DEFAULT_TIMEOUT = 30.0
+
+
+def connect_sqlite(
+    path: str, timeout: float = DEFAULT_TIMEOUT, autocommit: bool = False
+) -> sqlite3.Connection:
+    """
+    Open a SQLite database that several crawler processes can share: WAL lets
+    readers run alongside one writer, and writers wait up to `timeout` for
+    each other instead of failing.
+    :param path: Database file, or ":memory:"
+    :param timeout: Seconds to wait for a lock held by another connection
+    :param autocommit: Commit every statement, instead of opening a
+        transaction on the first write
+    :return: The connection
+    """
+    conn = sqlite3.connect(
+        path, timeout=timeout, isolation_level=None if autocommit else ""
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,25 @@
+import pytest
+
+from job_watcher.items import JobPost
+from job_watcher.model import Country, Location, Site
+
+
+@pytest.fixture
+def make_post():
+    """Build a JobPost with defaults for the fields a test doesn't care about."""
+
+    def make_post(job_id: str, **fields) -> JobPost:
+        defaults = {
+            "id": job_id,
+            "title": f"Engineer {job_id}",
+            "site": Site.LINKEDIN,
+            "job_url": f"https://example.com/jobs/{job_id}",
+            "company_name": "Acme",
+            "company_url": "https://example.com/company/acme",
+            "location": Location(
+                city="Berlin", state="Berlin", country=Country.GERMANY
+            ),
+        }
+        return JobPost(**{**defaults, **fields})
+
+    return make_post
@@ -0,0 +1,47 @@
+from job_watcher.budget import CrawlBudget
+
+
+def test_items_are_committed_per_query():
+    budget = CrawlBudget(max_items=3)
+
+    assert budget.commit("a")
+    assert budget.commit("b", count=2)
+    assert budget.items_exhausted
+    assert not budget.commit("a")
+    assert dict(budget.committed) == {"a": 1, "b": 2}
+    # Enough items is not a hard limit, in-flight details still download
+    assert not budget.exhausted
+
+
+def test_no_limits():
+    budget = CrawlBudget()
+    budget.commit("a", count=1000)
+    budget.record_request()
+    budget.record_response(10**9)
+
+    assert not budget.items_exhausted
+    assert budget.exhausted_reason is None
+
+
+def test_max_requests():
+    budget = CrawlBudget(max_requests=2)
+    budget.record_request()
+    assert not budget.exhausted
+    budget.record_request()
+    assert budget.exhausted_reason == "max_requests"
+
+
+def test_max_bytes():
+    budget = CrawlBudget(max_bytes=100)
+    budget.record_response(60)
+    assert not budget.exhausted
+    budget.record_response(40)
+    assert budget.exhausted_reason == "max_bytes"
+
+
+def test_deadline():
+    budget = CrawlBudget(max_seconds=30)
+    assert not budget.exhausted
+
+    budget.deadline -= 30
+    assert budget.exhausted_reason == "deadline"
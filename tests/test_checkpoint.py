@@ -0,0 +1,121 @@
+import json
+
+import pytest
+from scrapy.utils.test import get_crawler
+
+from job_watcher.checkpoint import CrawlCheckpoint
+from job_watcher.items import JobPost
+from job_watcher.spiders.linkedin.linkedin_spider import LinkedinSpider
+from job_watcher.spiders.linkedin.model import LinkedinParams
+
+# Recorded like LinkedinSpider records its arguments
+PARAMS = LinkedinParams(search_term="rust", results_wanted=10).model_dump(
+    mode="json", include=set(LinkedinParams.model_fields)
+)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "crawl.ckpt")
+
+
+def write_crawl(path, make_post):
+    """Checkpoint a crawl with one query left, one job emitted, one outstanding."""
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.start(PARAMS)
+    checkpoint.cursor("keywords=rust", {"keywords": "rust"}, 25)
+    for job_id in ("1", "2"):
+        post = make_post(f"li-{job_id}", description="long description")
+        checkpoint.pending(job_id, post.model_dump(mode="json"), ["keywords=rust"])
+    checkpoint.done("li-1")
+    checkpoint.close("shutdown")
+
+
+def test_replay(path, make_post):
+    write_crawl(path, make_post)
+    state = CrawlCheckpoint.load(path)
+
+    assert state.params == PARAMS
+    assert state.cursors["keywords=rust"].start == 25
+    assert list(state.pending) == ["li-2"]
+    assert state.emitted == {"li-1": "1"}
+    assert state.seen_job_ids == {"1", "2"}
+    assert not state.is_complete
+
+
+def test_emitted_items_are_journaled_by_id(path, make_post):
+    write_crawl(path, make_post)
+    CrawlCheckpoint(path, resume=True).close("shutdown")
+
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert {"type": "done", "id": "li-1", "job_id": "1"} in records
+    # Compaction drops the card data of the emitted job
+    assert [r["id"] for r in records if r["type"] == "pending"] == ["li-2"]
+
+
+def test_torn_last_record_is_ignored(path, make_post):
+    write_crawl(path, make_post)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "done", "id": "li-2", "jo')
+
+    state = CrawlCheckpoint.load(path)
+    assert list(state.pending) == ["li-2"]
+
+
+def test_existing_journal_is_replaced_unless_resumed(path, make_post):
+    write_crawl(path, make_post)
+
+    checkpoint = CrawlCheckpoint(path)
+    assert not checkpoint.is_resumed
+    checkpoint.close("shutdown")
+    assert CrawlCheckpoint.load(path).is_empty
+
+
+def test_resume_refuses_other_arguments(path, make_post):
+    write_crawl(path, make_post)
+    checkpoint = CrawlCheckpoint(path, resume=True)
+
+    with pytest.raises(ValueError):
+        checkpoint.start({**PARAMS, "search_term": "golang"})
+    checkpoint.start(PARAMS)
+    checkpoint.close("shutdown")
+
+
+def test_journal_is_removed_when_the_crawl_finishes(path, make_post):
+    write_crawl(path, make_post)
+
+    checkpoint = CrawlCheckpoint(path, resume=True)
+    checkpoint.close("finished")
+    assert CrawlCheckpoint.load(path).params == PARAMS
+
+    checkpoint = CrawlCheckpoint(path, resume=True)
+    checkpoint.query_done("keywords=rust")
+    checkpoint.done("li-2")
+    checkpoint.close("finished")
+    assert CrawlCheckpoint.load(path).is_empty
+
+
+def test_spider_resumes_outstanding_jobs_and_queries(path, make_post):
+    write_crawl(path, make_post)
+    crawler = get_crawler(
+        LinkedinSpider,
+        {"CRAWL_CHECKPOINT_PATH": path, "CRAWL_CHECKPOINT_RESUME": True},
+    )
+    spider = LinkedinSpider.from_crawler(crawler, search_term="rust", results_wanted=10)
+
+    assert spider.checkpoint.is_resumed
+    items, requests = [], []
+    for output in spider.resume():
+        (items if isinstance(output, JobPost) else requests).append(output)
+    # Without descriptions, the outstanding card is emitted as is
+    assert [(item.id, item.query_tags) for item in items] == [
+        ("li-2", ["keywords=rust"])
+    ]
+    assert [request.url for request in requests] == [
+        "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
+        "?keywords=rust&start=25",
+    ]
+    assert spider.seen_ids == {"1", "2"}
+    assert spider.budget.committed_items == 2
+    spider.checkpoint.close("shutdown")
@@ -0,0 +1,60 @@
+import datetime as dt
+
+import pytest
+
+from job_watcher.database import JobPostDatabase
+
+T0 = dt.datetime(2025, 5, 1, 8, 0, tzinfo=dt.timezone.utc)
+T1 = dt.datetime(2025, 5, 2, 8, 0, tzinfo=dt.timezone.utc)
+
+
+@pytest.fixture
+def db():
+    db = JobPostDatabase.from_url("sqlite:///")
+    db.create_tables()
+    yield db
+    db.close()
+
+
+def test_upsert_keeps_first_seen_and_bumps_last_seen(db, make_post):
+    db.upsert([make_post("li-1", title="Engineer")], seen_at=T0)
+    db.upsert([make_post("li-1", title="Senior Engineer")], seen_at=T1)
+
+    assert db.query("SELECT id, title, first_seen, last_seen FROM job_posts") == [
+        ("li-1", "Senior Engineer", T0.isoformat(), T1.isoformat())
+    ]
+
+
+def test_upsert_shares_company_and_location_rows(db, make_post):
+    db.upsert([make_post("li-1"), make_post("li-2")], seen_at=T0)
+    db.upsert(
+        [make_post("li-3", company_name="Other", company_url="https://other.example")],
+        seen_at=T1,
+    )
+
+    assert db.query("SELECT name, url FROM companies ORDER BY id") == [
+        ("Acme", "https://example.com/company/acme"),
+        ("Other", "https://other.example"),
+    ]
+    assert db.query("SELECT city, state, country FROM locations") == [
+        ("Berlin", "Berlin", "GERMANY")
+    ]
+    rows = db.query("SELECT id, company_id, location_id FROM job_posts ORDER BY id")
+    assert rows == [("li-1", 1, 1), ("li-2", 1, 1), ("li-3", 2, 1)]
+
+
+def test_upsert_later_duplicate_in_batch_wins(db, make_post):
+    db.upsert([make_post("li-1", title="Old"), make_post("li-1", title="New")], T0)
+
+    assert db.query("SELECT title FROM job_posts") == [("New",)]
+
+
+def test_upsert_skips_items_without_id(db, make_post):
+    db.upsert([make_post(None)], seen_at=T0)
+
+    assert db.query("SELECT COUNT(*) FROM job_posts") == [(0,)]
+
+
+def test_from_url_rejects_unknown_scheme():
+    with pytest.raises(ValueError):
+        JobPostDatabase.from_url("mysql://localhost/jobs")
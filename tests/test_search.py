@@ -0,0 +1,80 @@
+import datetime as dt
+import sqlite3
+
+import pytest
+
+from job_watcher.model import Location, Site
+from job_watcher.search import SearchIndex, quote_terms
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex(":memory:")
+    yield index
+    index.close()
+
+
+def ids(results):
+    return [result.job_id for result in results]
+
+
+def test_readding_a_job_replaces_its_document(index, make_post):
+    index.add([make_post("li-1", description="Rust and Kubernetes")])
+    index.add([make_post("li-1", description="Go and Terraform")])
+
+    assert len(index) == 1
+    assert ids(index.search("rust")) == []
+    assert ids(index.search("terraform")) == ["li-1"]
+
+
+def test_title_matches_rank_first(index, make_post):
+    index.add(
+        [
+            make_post("li-1", title="Engineer", description="Some rust"),
+            make_post("li-2", title="Rust engineer", description="Systems work"),
+        ]
+    )
+
+    assert ids(index.search("rust")) == ["li-2", "li-1"]
+
+
+def test_filters(index, make_post):
+    index.add(
+        [
+            make_post(
+                "li-1",
+                description="python",
+                is_remote=True,
+                date_posted=dt.date(2025, 5, 1),
+            ),
+            make_post(
+                "in-2",
+                site=Site.INDEED,
+                description="python",
+                location=Location(city="Munich", state="Bavaria"),
+                date_posted=dt.date(2025, 5, 10),
+            ),
+        ]
+    )
+
+    assert ids(index.search("python", site=Site.INDEED)) == ["in-2"]
+    assert ids(index.search("python", is_remote=True)) == ["li-1"]
+    assert ids(index.search("python", location="munich")) == ["in-2"]
+    assert ids(index.search("", location="berlin")) == ["li-1"]
+    assert ids(index.search("python", posted_after=dt.date(2025, 5, 5))) == ["in-2"]
+    assert ids(index.search("python", posted_before=dt.date(2025, 5, 5))) == ["li-1"]
+
+
+def test_plain_queries_are_quoted(index, make_post):
+    index.add([make_post("li-1", description="C++ and node.js")])
+
+    assert quote_terms('c++ node.js "x') == '"c++" AND "node.js" AND """x"'
+    assert ids(index.search("c++")) == ["li-1"]
+    assert ids(index.search("node.js")) == ["li-1"]
+    with pytest.raises(sqlite3.OperationalError):
+        index.search("c++", raw=True)
+
+
+def test_query_or_location_required(index):
+    with pytest.raises(ValueError):
+        index.search("  ")